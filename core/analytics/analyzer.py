@@ -1,9 +1,11 @@
-import json
 import logging
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
-from core.analytics.db import AnalyticsDB
+from core.analytics.db import AnalyticsDB, DOMINANT_VISUAL_FIELDS, HOOK_VISUAL_FIELDS
+from core.analytics.utils import read_json, write_json_atomic
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,17 @@ PILLAR_GROUPS = {
     "Products & Gear": ["product", "gear", "budget", "registry", "must have", "essentials"],
     "Parenting Life": ["mom", "parent", "self care", "partner", "work life", "guilt", "exhausted", "screen time"],
 }
+# Lowercased once, in PILLAR_GROUPS order (first matching group wins)
+_PILLAR_KEYWORDS = tuple(
+    (group, tuple(kw.lower() for kw in keywords)) for group, keywords in PILLAR_GROUPS.items()
+)
+
+# post_visuals column -> attribute label in the visual breakdowns
+_DOMINANT_VISUAL_COLUMNS = {attr: attr for attr in DOMINANT_VISUAL_FIELDS}
+_HOOK_VISUAL_COLUMNS = {f"hook_{attr}": attr for attr in HOOK_VISUAL_FIELDS}
+# Only what the visual breakdowns read: metrics plus the typed attribute columns
+_VISUAL_QUERY_COLUMNS = (("views", "saves", "engagement_rate")
+                         + tuple(_DOMINANT_VISUAL_COLUMNS) + tuple(_HOOK_VISUAL_COLUMNS))
 
 
 class AccountAnalyzer:
@@ -27,10 +40,18 @@ class AccountAnalyzer:
 
     def analyze_formats(self, account_name: str) -> dict:
         """Format performance breakdown."""
-        rows = self.db.execute(
-            "SELECT * FROM v_format_comparison WHERE account_name = ?",
-            (account_name,)
-        ).fetchall()
+        # Same aggregates as v_format_comparison, but read straight off the
+        # denormalized posts columns so idx_posts_account_format drives both
+        # the account filter and the grouping (no temp B-tree)
+        rows = self.db.execute("""
+            SELECT format, COUNT(*) as post_count,
+                   AVG(latest_views) as avg_views, AVG(latest_likes) as avg_likes,
+                   AVG(latest_saves) as avg_saves,
+                   AVG(latest_engagement_rate) as avg_engagement_rate
+            FROM posts
+            WHERE account_name = ? AND latest_scraped_at IS NOT NULL
+            GROUP BY format
+        """, (account_name,)).fetchall()
         return {
             row["format"]: {
                 "post_count": row["post_count"],
@@ -50,33 +71,34 @@ class AccountAnalyzer:
             WHERE account_name = ? AND content_pillar IS NOT NULL
         """, (account_name,)).fetchall()
 
-        grouped = {}
+        grouped = defaultdict(lambda: {"post_count": 0, "views": 0, "saves": 0, "engagement": 0})
         for row in rows:
-            topic = row["content_pillar"].lower()
-            group = self._classify_pillar(topic)
-            if group not in grouped:
-                grouped[group] = {"views": [], "saves": [], "engagement": []}
-            grouped[group]["views"].append(row["views"] or 0)
-            grouped[group]["saves"].append(row["saves"] or 0)
-            grouped[group]["engagement"].append(row["engagement_rate"] or 0)
+            data = grouped[self._classify_pillar(row["content_pillar"])]
+            data["post_count"] += 1
+            data["views"] += row["views"] or 0
+            data["saves"] += row["saves"] or 0
+            data["engagement"] += row["engagement_rate"] or 0
 
-        result = {}
-        for group, data in grouped.items():
-            n = len(data["views"])
-            result[group] = {
-                "post_count": n,
-                "avg_views": sum(data["views"]) / n if n else 0,
-                "avg_saves": sum(data["saves"]) / n if n else 0,
-                "avg_engagement_rate": sum(data["engagement"]) / n if n else 0,
+        return {
+            group: {
+                "post_count": data["post_count"],
+                "avg_views": data["views"] / data["post_count"],
+                "avg_saves": data["saves"] / data["post_count"],
+                "avg_engagement_rate": data["engagement"] / data["post_count"],
             }
-        return result
+            for group, data in grouped.items()
+        }
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _classify_pillar(topic: str) -> str:
-        """Map a specific topic to a broad pillar group."""
+        """Map a specific topic to a broad pillar group.
+
+        Topics repeat across posts, so the keyword scan is memoized per topic.
+        """
         topic_lower = topic.lower()
-        for group, keywords in PILLAR_GROUPS.items():
-            if any(kw.lower() in topic_lower for kw in keywords):
+        for group, keywords in _PILLAR_KEYWORDS:
+            if any(kw in topic_lower for kw in keywords):
                 return group
         return "Other"
 
@@ -242,39 +264,8 @@ class AccountAnalyzer:
 
         Groups each visual attribute by value, returns avg views/saves/engagement per value.
         """
-        rows = self.db.get_visuals_for_account(account_name)
-        if not rows:
-            return {}
-
-        visual_attrs = [
-            "photography_style", "lighting", "color_palette",
-            "composition", "scene_setting", "subject_focus", "mood"
-        ]
-        result = {}
-        for attr in visual_attrs:
-            grouped = {}
-            for row in rows:
-                val = row.get(attr)
-                if not val:
-                    continue
-                if val not in grouped:
-                    grouped[val] = {"views": [], "saves": [], "engagement": []}
-                grouped[val]["views"].append(row.get("views") or 0)
-                grouped[val]["saves"].append(row.get("saves") or 0)
-                grouped[val]["engagement"].append(row.get("engagement_rate") or 0)
-
-            attr_result = {}
-            for val, data in grouped.items():
-                n = len(data["views"])
-                attr_result[val] = {
-                    "post_count": n,
-                    "avg_views": sum(data["views"]) / n if n else 0,
-                    "avg_saves": sum(data["saves"]) / n if n else 0,
-                    "avg_engagement_rate": sum(data["engagement"]) / n if n else 0,
-                }
-            if attr_result:
-                result[attr] = attr_result
-        return result
+        rows = self.db.get_visuals_for_account(account_name, _VISUAL_QUERY_COLUMNS)
+        return self._aggregate_visuals(rows, _DOMINANT_VISUAL_COLUMNS)
 
     def analyze_hook_visuals(self, account_name: str) -> dict:
         """Hook-specific visual attribute performance.
@@ -282,42 +273,45 @@ class AccountAnalyzer:
         Same as analyze_visuals but uses hook_* columns (composition, photography_style,
         lighting, mood) since the hook slide is the scroll-stopper.
         """
-        rows = self.db.get_visuals_for_account(account_name)
-        if not rows:
-            return {}
+        rows = self.db.get_visuals_for_account(account_name, _VISUAL_QUERY_COLUMNS)
+        return self._aggregate_visuals(rows, _HOOK_VISUAL_COLUMNS)
 
-        hook_attrs = {
-            "hook_composition": "composition",
-            "hook_photography_style": "photography_style",
-            "hook_lighting": "lighting",
-            "hook_mood": "mood",
-            "hook_subject_focus": "subject_focus",
-        }
-        result = {}
-        for col, label in hook_attrs.items():
-            grouped = {}
-            for row in rows:
+    @staticmethod
+    def _aggregate_visuals(rows: list[dict], columns: dict) -> dict:
+        """Per-value performance for each visual column, in a single pass over rows.
+
+        ``columns`` maps the post_visuals column to the label used in the result.
+        Attributes with no values are left out.
+        """
+        grouped = {col: {} for col in columns}
+        for row in rows:
+            views = row.get("views") or 0
+            saves = row.get("saves") or 0
+            engagement = row.get("engagement_rate") or 0
+            for col, by_value in grouped.items():
                 val = row.get(col)
                 if not val:
                     continue
-                if val not in grouped:
-                    grouped[val] = {"views": [], "saves": [], "engagement": []}
-                grouped[val]["views"].append(row.get("views") or 0)
-                grouped[val]["saves"].append(row.get("saves") or 0)
-                grouped[val]["engagement"].append(row.get("engagement_rate") or 0)
-
-            attr_result = {}
-            for val, data in grouped.items():
-                n = len(data["views"])
-                attr_result[val] = {
-                    "post_count": n,
-                    "avg_views": sum(data["views"]) / n if n else 0,
-                    "avg_saves": sum(data["saves"]) / n if n else 0,
-                    "avg_engagement_rate": sum(data["engagement"]) / n if n else 0,
+                data = by_value.get(val)
+                if data is None:
+                    data = by_value[val] = {"post_count": 0, "views": 0, "saves": 0, "engagement": 0}
+                data["post_count"] += 1
+                data["views"] += views
+                data["saves"] += saves
+                data["engagement"] += engagement
+
+        return {
+            columns[col]: {
+                val: {
+                    "post_count": data["post_count"],
+                    "avg_views": data["views"] / data["post_count"],
+                    "avg_saves": data["saves"] / data["post_count"],
+                    "avg_engagement_rate": data["engagement"] / data["post_count"],
                 }
-            if attr_result:
-                result[label] = attr_result
-        return result
+                for val, data in by_value.items()
+            }
+            for col, by_value in grouped.items() if by_value
+        }
 
     def full_report(self, account_name: str) -> dict:
         """Complete analysis report for an account."""
@@ -344,8 +338,10 @@ class AccountAnalyzer:
         Merges into existing context (preserves format_weights, pillar tiers, etc.).
         Returns the visual_insights dict that was written.
         """
-        visuals = self.analyze_visuals(account_name)
-        hook_visuals = self.analyze_hook_visuals(account_name)
+        # One fetch feeds both the dominant and the hook breakdowns
+        rows = self.db.get_visuals_for_account(account_name, _VISUAL_QUERY_COLUMNS)
+        visuals = self._aggregate_visuals(rows, _DOMINANT_VISUAL_COLUMNS)
+        hook_visuals = self._aggregate_visuals(rows, _HOOK_VISUAL_COLUMNS)
 
         # Determine total sample size from visual data
         all_counts = []
@@ -356,11 +352,7 @@ class AccountAnalyzer:
 
         # Pick top value per attribute (min 2 posts)
         top_performing = {}
-        visual_attrs = [
-            "photography_style", "lighting", "color_palette",
-            "composition", "scene_setting", "subject_focus", "mood"
-        ]
-        for attr in visual_attrs:
+        for attr in DOMINANT_VISUAL_FIELDS:
             attr_data = visuals.get(attr, {})
             qualified = {v: d for v, d in attr_data.items() if d["post_count"] >= 2}
             if qualified:
@@ -377,7 +369,7 @@ class AccountAnalyzer:
 
         # Explore targets — attribute values with <2 posts (blind spots)
         explore_targets = {}
-        for attr in visual_attrs:
+        for attr in DOMINANT_VISUAL_FIELDS:
             attr_data = visuals.get(attr, {})
             untested = [v for v, d in attr_data.items() if d["post_count"] < 2]
             if untested:
@@ -399,18 +391,17 @@ class AccountAnalyzer:
 
         # Load existing context, merge, and write
         existing = {}
-        if context_path.exists():
-            try:
-                existing = json.loads(context_path.read_text())
-            except (json.JSONDecodeError, OSError):
-                pass
+        try:
+            existing = read_json(context_path)
+        except (ValueError, OSError):
+            pass
 
         existing["visual_insights"] = visual_insights
         existing["explore_targets"] = explore_targets
         existing["exploration_ratio"] = exploration_ratio
         existing["last_updated"] = datetime.now().strftime("%Y-%m-%d")
 
-        context_path.write_text(json.dumps(existing, indent=2))
+        write_json_atomic(context_path, existing)
         logger.info(f"Refreshed visual context for {account_name}: "
                      f"{len(top_performing)} top attrs, {len(explore_targets)} explore targets, "
                      f"ratio={exploration_ratio}")
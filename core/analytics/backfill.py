@@ -77,7 +77,7 @@ class BackfillMatcher:
             key = (gen.get("topic", ""), gen.get("format", ""))
             gen_by_key[key] = gen
 
-        extracted_count = 0
+        rows = []
         for post in matched:
             # Skip if visuals already exist
             if self.db.get_post_visuals(post["post_id"]):
@@ -89,17 +89,18 @@ class BackfillMatcher:
 
             if image_prompts:
                 visuals = extract_from_post(image_prompts)
-                self.db.upsert_post_visuals(
-                    post_id=post["post_id"],
-                    dominant=visuals["dominant"],
-                    hook=visuals["hook"],
-                    all_attributes=visuals["all_attributes"],
-                )
-                extracted_count += 1
+                rows.append({
+                    "post_id": post["post_id"],
+                    "dominant": visuals["dominant"],
+                    "hook": visuals["hook"],
+                    "all_attributes": visuals["all_attributes"],
+                })
                 logger.info(f"Extracted visuals for {post['post_id']} ({post.get('topic')})")
 
-        logger.info(f"Visual backfill: {extracted_count}/{len(matched)} posts for {account_name}")
-        return extracted_count
+        if rows:
+            self.db.bulk_upsert_post_visuals(rows)
+        logger.info(f"Visual backfill: {len(rows)}/{len(matched)} posts for {account_name}")
+        return len(rows)
 
     def _index_generated_content(self) -> list[dict]:
         """Scan output directories for meta.json and carousel_data.json files."""
@@ -486,17 +486,16 @@ accounts.forEach((name, idx) => {{
     // Recommendations HTML
     let recsHTML = '';
     if (recommendations.length > 0) {{
-        let recsCards = '';
-        recommendations.forEach(rec => {{
+        const recsCards = recommendations.map(rec => {{
             const conf = rec.confidence || 'medium';
             const status = rec.status || 'pending';
-            recsCards += `
+            return `
                 <div class="rec-card">
                     <div class="rec-category rec-confidence-${{conf}}">${{conf.toUpperCase()}} \u00b7 ${{(rec.category || '').replace(/_/g, ' ')}}</div>
                     <div class="rec-insight">${{rec.insight || ''}}</div>
                     <span class="rec-status rec-status-${{status}}">${{status}}</span>
                 </div>`;
-        }});
+        }}).join('');
         recsHTML = `
             <div class="section-header">
                 <h2>AI Recommendations</h2>
@@ -787,9 +786,11 @@ accounts.forEach((name, idx) => {{
     const fmtBody = document.getElementById('format-table-' + name);
     const saveRateByFmt = saveRate.by_format || {{}};
     const sorted = [...fmtNames].sort((a, b) => (formats[b].avg_views || 0) - (formats[a].avg_views || 0));
-    sorted.forEach(f => {{
+    // Build each table's rows as one string and assign once: `innerHTML +=`
+    // in a loop re-serializes and re-parses the whole table on every row
+    fmtBody.innerHTML = sorted.map(f => {{
         const d = formats[f];
-        fmtBody.innerHTML += `<tr>
+        return `<tr>
             <td>${{getBadge(f)}}</td>
             <td>${{d.post_count}}</td>
             <td>${{fmt(Math.round(d.avg_views))}}</td>
@@ -797,29 +798,25 @@ accounts.forEach((name, idx) => {{
             <td>${{(saveRateByFmt[f] || 0).toFixed(1)}}%</td>
             <td>${{pct(d.avg_engagement_rate)}}</td>
         </tr>`;
-    }});
+    }}).join('');
 
     const topBody = document.getElementById('top-table-' + name);
-    topPosts.slice(0, 8).forEach(p => {{
-        topBody.innerHTML += `<tr>
+    topBody.innerHTML = topPosts.slice(0, 8).map(p => `<tr>
             <td>${{(p.hook_text || '').slice(0, 70)}}</td>
             <td>${{getBadge(p.format)}}</td>
             <td>${{fmt(p.views)}}</td>
             <td>${{fmt(p.saves)}}</td>
             <td>${{pct(p.engagement_rate)}}</td>
-        </tr>`;
-    }});
+        </tr>`).join('');
 
     const bottomBody = document.getElementById('bottom-table-' + name);
-    bottomPosts.slice(0, 8).forEach(p => {{
-        bottomBody.innerHTML += `<tr>
+    bottomBody.innerHTML = bottomPosts.slice(0, 8).map(p => `<tr>
             <td>${{(p.hook_text || '').slice(0, 70)}}</td>
             <td>${{getBadge(p.format)}}</td>
             <td>${{fmt(p.views)}}</td>
             <td>${{fmt(p.saves)}}</td>
             <td>${{pct(p.engagement_rate)}}</td>
-        </tr>`;
-    }});
+        </tr>`).join('');
 }});
 </script>
 </body>
@@ -2,7 +2,7 @@ import sqlite3
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 
 SCHEMA = """
@@ -19,9 +19,24 @@ CREATE TABLE IF NOT EXISTS posts (
     slide_count INTEGER,
     content_pillar TEXT,
     published_at DATETIME,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    -- Denormalized copy of the latest metrics_snapshots row (see trg_snapshot_latest)
+    latest_views INTEGER,
+    latest_likes INTEGER,
+    latest_comments INTEGER,
+    latest_shares INTEGER,
+    latest_saves INTEGER,
+    latest_engagement_rate REAL,
+    latest_scraped_at DATETIME
 );
 
+-- Per-account filters, and per-format grouping without a sort
+CREATE INDEX IF NOT EXISTS idx_posts_account_format ON posts(account_name, format);
+
+-- get_posts_for_account: newest-first listing straight off the index
+CREATE INDEX IF NOT EXISTS idx_posts_account_published
+    ON posts(account_name, published_at DESC);
+
 CREATE TABLE IF NOT EXISTS metrics_snapshots (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     post_id TEXT NOT NULL REFERENCES posts(post_id),
@@ -34,6 +49,23 @@ CREATE TABLE IF NOT EXISTS metrics_snapshots (
     engagement_rate REAL DEFAULT 0.0
 );
 
+-- Serves latest-snapshot lookups (and the latest_* backfill) as an index seek
+CREATE INDEX IF NOT EXISTS idx_snapshots_post_time
+    ON metrics_snapshots(post_id, scraped_at DESC, id DESC);
+
+-- Keep posts.latest_* in step with every snapshot write, in the same transaction
+CREATE TRIGGER IF NOT EXISTS trg_snapshot_latest
+AFTER INSERT ON metrics_snapshots
+BEGIN
+    UPDATE posts SET
+        latest_views = NEW.views, latest_likes = NEW.likes,
+        latest_comments = NEW.comments, latest_shares = NEW.shares,
+        latest_saves = NEW.saves, latest_engagement_rate = NEW.engagement_rate,
+        latest_scraped_at = NEW.scraped_at
+    WHERE post_id = NEW.post_id
+      AND (latest_scraped_at IS NULL OR latest_scraped_at <= NEW.scraped_at);
+END;
+
 CREATE TABLE IF NOT EXISTS recommendations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     account_name TEXT NOT NULL,
@@ -51,13 +83,12 @@ SELECT
     p.id, p.account_name, p.platform, p.post_id, p.post_url,
     p.topic, p.format, p.hook_text, p.hook_score, p.slide_count,
     p.content_pillar, p.published_at,
-    ms.views, ms.likes, ms.comments, ms.shares, ms.saves,
-    ms.engagement_rate, ms.scraped_at
+    p.latest_views AS views, p.latest_likes AS likes,
+    p.latest_comments AS comments, p.latest_shares AS shares,
+    p.latest_saves AS saves, p.latest_engagement_rate AS engagement_rate,
+    p.latest_scraped_at AS scraped_at
 FROM posts p
-JOIN metrics_snapshots ms ON p.post_id = ms.post_id
-WHERE ms.id = (
-    SELECT m2.id FROM metrics_snapshots m2 WHERE m2.post_id = p.post_id ORDER BY m2.scraped_at DESC, m2.id DESC LIMIT 1
-);
+WHERE p.latest_scraped_at IS NOT NULL;
 
 CREATE VIEW IF NOT EXISTS v_format_comparison AS
 SELECT
@@ -113,22 +144,122 @@ JOIN post_visuals pv ON pp.post_id = pv.post_id;
 """
 
 
+MEMORY_DB = ":memory:"
+
+# Stored in PRAGMA user_version. Bump whenever SCHEMA changes so existing DBs
+# re-run it (and any migration) on their next open.
+SCHEMA_VERSION = 2
+
+# Host parameters per IN (...) query; older SQLite builds cap a statement at 999
+MAX_QUERY_PARAMS = 900
+
+LATEST_METRIC_COLUMNS = (
+    ("latest_views", "INTEGER"), ("latest_likes", "INTEGER"),
+    ("latest_comments", "INTEGER"), ("latest_shares", "INTEGER"),
+    ("latest_saves", "INTEGER"), ("latest_engagement_rate", "REAL"),
+    ("latest_scraped_at", "DATETIME"),
+)
+
+# Optional post fields: filled on insert, and only overwrite on update when not None
+POST_FIELDS = ("post_url", "topic", "format", "hook_text", "hook_score",
+               "slide_count", "content_pillar", "published_at")
+
+
+# Visual attributes stored per post: the dominant look across all slides, and
+# the subset tracked separately for the hook slide (stored as hook_<attr>)
+DOMINANT_VISUAL_FIELDS = ("photography_style", "lighting", "color_palette", "composition",
+                          "scene_setting", "subject_focus", "mood")
+HOOK_VISUAL_FIELDS = ("composition", "photography_style", "lighting", "mood", "subject_focus")
+
+# Write statements, built once so every call reuses the cached statement
+_UPSERT_POST_COLUMNS = ("account_name", "platform", "post_id") + POST_FIELDS
+_UPSERT_POSTS_SQL = f"""
+    INSERT INTO posts ({", ".join(_UPSERT_POST_COLUMNS)})
+    VALUES ({", ".join("?" * len(_UPSERT_POST_COLUMNS))})
+    ON CONFLICT(post_id) DO UPDATE SET
+    {", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in POST_FIELDS)}
+"""
+_INSERT_SNAPSHOT_SQL = """
+    INSERT INTO metrics_snapshots (post_id, views, likes, comments, shares, saves, engagement_rate)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_UPSERT_VISUAL_COLUMNS = (("post_id",) + DOMINANT_VISUAL_FIELDS
+                          + tuple(f"hook_{attr}" for attr in HOOK_VISUAL_FIELDS)
+                          + ("all_attributes_json",))
+_UPSERT_VISUALS_SQL = f"""
+    INSERT INTO post_visuals ({", ".join(_UPSERT_VISUAL_COLUMNS)})
+    VALUES ({", ".join("?" * len(_UPSERT_VISUAL_COLUMNS))})
+    ON CONFLICT(post_id) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in _UPSERT_VISUAL_COLUMNS[1:])}
+"""
+
+
 class AnalyticsDB:
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Union[Path, str]] = None, test_mode: bool = False,
+                 timeout: float = 5.0):
+        """Open (and create if needed) the analytics DB.
+
+        Pass ":memory:" for a throwaway in-process database, e.g. in tests.
+        test_mode=True trades crash safety for speed on DB files that tests
+        throw away: no WAL, no fsync, and an exclusive lock held until close().
+        timeout is how many seconds a write waits for another connection's
+        write lock before raising "database is locked".
+        """
         if db_path is None:
             db_path = Path(__file__).parent.parent.parent / "data" / "analytics.db"
-        db_path.parent.mkdir(parents=True, exist_ok=True)
+        if db_path != MEMORY_DB:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
+        # Room for every distinct statement this class issues, so none is re-prepared
+        self.conn = sqlite3.connect(str(db_path), timeout=timeout, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
-        self.conn.execute("PRAGMA journal_mode=WAL")
+        if db_path != MEMORY_DB and test_mode:
+            self.conn.execute("PRAGMA journal_mode=MEMORY")
+            self.conn.execute("PRAGMA synchronous=OFF")
+            self.conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        elif db_path != MEMORY_DB:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode NORMAL only syncs at checkpoints: commits survive an
+            # app crash, and the per-commit fsync is gone
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA mmap_size=268435456")
         self.conn.execute("PRAGMA foreign_keys=ON")
+        # ~20 MB page cache and in-memory temp tables for the analyzer's aggregations
+        self.conn.execute("PRAGMA cache_size=-20000")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._init_schema()
 
     def _init_schema(self):
+        # Connections are opened per thread/process; once a DB file is at the
+        # current version, skip re-running the DDL script on every open
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
+        self._migrate_latest_metrics()
         self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
 
+    def _migrate_latest_metrics(self):
+        """Add and backfill posts.latest_* on DBs created before they existed.
+
+        The old v_post_performance (which joined metrics_snapshots) is dropped
+        so SCHEMA recreates it over the new columns.
+        """
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(posts)")}
+        if not columns or "latest_views" in columns:
+            return
+        with self.conn:
+            for col, col_type in LATEST_METRIC_COLUMNS:
+                self.conn.execute(f"ALTER TABLE posts ADD COLUMN {col} {col_type}")
+            self.conn.execute(f"""
+                UPDATE posts SET ({", ".join(col for col, _ in LATEST_METRIC_COLUMNS)}) = (
+                    SELECT views, likes, comments, shares, saves, engagement_rate, scraped_at
+                    FROM metrics_snapshots ms WHERE ms.post_id = posts.post_id
+                    ORDER BY ms.scraped_at DESC, ms.id DESC LIMIT 1
+                )""")
+            self.conn.execute("DROP VIEW IF EXISTS v_post_performance")
+
     def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
         return self.conn.execute(sql, params)
 
@@ -142,36 +273,41 @@ class AnalyticsDB:
                     hook_text: str = None, hook_score: float = None,
                     slide_count: int = None, content_pillar: str = None,
                     published_at: str = None):
-        existing = self.get_post(post_id)
-        if existing:
-            fields = {}
-            for key, val in [("topic", topic), ("format", format), ("hook_text", hook_text),
-                             ("hook_score", hook_score), ("slide_count", slide_count),
-                             ("content_pillar", content_pillar), ("post_url", post_url),
-                             ("published_at", published_at)]:
-                if val is not None:
-                    fields[key] = val
-            if fields:
-                set_clause = ", ".join(f"{k} = ?" for k in fields)
-                self.conn.execute(
-                    f"UPDATE posts SET {set_clause} WHERE post_id = ?",
-                    (*fields.values(), post_id)
-                )
-                self.conn.commit()
-        else:
+        with self.conn:
             self.conn.execute(
-                """INSERT INTO posts (account_name, platform, post_id, post_url, topic,
-                   format, hook_text, hook_score, slide_count, content_pillar, published_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                _UPSERT_POSTS_SQL,
                 (account_name, platform, post_id, post_url, topic, format,
                  hook_text, hook_score, slide_count, content_pillar, published_at)
             )
-            self.conn.commit()
+
+    def bulk_upsert_posts(self, rows: list[dict]):
+        """Upsert many posts in one transaction.
+
+        Each row takes the same keys as upsert_post(); as there, None fields
+        leave the stored value alone when the post already exists.
+        """
+        with self.conn:
+            self.conn.executemany(
+                _UPSERT_POSTS_SQL,
+                [tuple(row.get(c) for c in _UPSERT_POST_COLUMNS) for row in rows]
+            )
 
     def get_post(self, post_id: str) -> Optional[dict]:
         row = self.conn.execute("SELECT * FROM posts WHERE post_id = ?", (post_id,)).fetchone()
         return dict(row) if row else None
 
+    def get_existing_post_ids(self, post_ids: list[str]) -> set[str]:
+        """Return the subset of post_ids already stored, one query per chunk of ids."""
+        existing = set()
+        for start in range(0, len(post_ids), MAX_QUERY_PARAMS):
+            chunk = tuple(post_ids[start:start + MAX_QUERY_PARAMS])
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT post_id FROM posts WHERE post_id IN ({placeholders})", chunk
+            )
+            existing.update(row["post_id"] for row in rows)
+        return existing
+
     def get_posts_for_account(self, account_name: str) -> list[dict]:
         rows = self.conn.execute(
             "SELECT * FROM posts WHERE account_name = ? ORDER BY published_at DESC",
@@ -186,18 +322,37 @@ class AnalyticsDB:
         total_engagement = likes + comments + shares + saves
         engagement_rate = total_engagement / views if views > 0 else 0.0
         self.conn.execute(
-            """INSERT INTO metrics_snapshots (post_id, views, likes, comments, shares, saves, engagement_rate)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            _INSERT_SNAPSHOT_SQL,
             (post_id, views, likes, comments, shares, saves, engagement_rate)
         )
         self.conn.commit()
 
-    def get_snapshots(self, post_id: str) -> list[dict]:
-        rows = self.conn.execute(
+    def bulk_insert_snapshots(self, rows: list[dict]):
+        """Insert many snapshots (same keys as insert_snapshot()) in one transaction."""
+        params = []
+        for row in rows:
+            views = row.get("views", 0)
+            likes = row.get("likes", 0)
+            comments = row.get("comments", 0)
+            shares = row.get("shares", 0)
+            saves = row.get("saves", 0)
+            total_engagement = likes + comments + shares + saves
+            engagement_rate = total_engagement / views if views > 0 else 0.0
+            params.append((row["post_id"], views, likes, comments, shares, saves, engagement_rate))
+        with self.conn:
+            self.conn.executemany(_INSERT_SNAPSHOT_SQL, params)
+
+    def get_snapshots(self, post_id: str) -> list[sqlite3.Row]:
+        """Snapshots for a post, oldest first.
+
+        Rows support key access (row["views"]); call dict(row) where a real
+        dict is needed. A post accumulates one row per scrape, so this skips
+        the per-row dict copy.
+        """
+        return self.conn.execute(
             "SELECT * FROM metrics_snapshots WHERE post_id = ? ORDER BY scraped_at ASC",
             (post_id,)
         ).fetchall()
-        return [dict(r) for r in rows]
 
     # --- Recommendations ---
 
@@ -236,50 +391,29 @@ class AnalyticsDB:
     def upsert_post_visuals(self, post_id: str, dominant: dict, hook: dict,
                             all_attributes: dict):
         """Insert or update visual attributes for a post."""
-        all_json = json.dumps(all_attributes) if all_attributes else "{}"
-        existing = self.conn.execute(
-            "SELECT id FROM post_visuals WHERE post_id = ?", (post_id,)
-        ).fetchone()
-
-        params = (
-            dominant.get("photography_style"),
-            dominant.get("lighting"),
-            dominant.get("color_palette"),
-            dominant.get("composition"),
-            dominant.get("scene_setting"),
-            dominant.get("subject_focus"),
-            dominant.get("mood"),
-            hook.get("composition"),
-            hook.get("photography_style"),
-            hook.get("lighting"),
-            hook.get("mood"),
-            hook.get("subject_focus"),
-            all_json,
-        )
-
-        if existing:
-            self.conn.execute(
-                """UPDATE post_visuals SET
-                    photography_style=?, lighting=?, color_palette=?,
-                    composition=?, scene_setting=?, subject_focus=?, mood=?,
-                    hook_composition=?, hook_photography_style=?,
-                    hook_lighting=?, hook_mood=?, hook_subject_focus=?,
-                    all_attributes_json=?
-                WHERE post_id = ?""",
-                (*params, post_id)
-            )
-        else:
-            self.conn.execute(
-                """INSERT INTO post_visuals
-                    (post_id, photography_style, lighting, color_palette,
-                     composition, scene_setting, subject_focus, mood,
-                     hook_composition, hook_photography_style,
-                     hook_lighting, hook_mood, hook_subject_focus,
-                     all_attributes_json)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (post_id, *params)
-            )
-        self.conn.commit()
+        self.bulk_upsert_post_visuals([{
+            "post_id": post_id, "dominant": dominant,
+            "hook": hook, "all_attributes": all_attributes,
+        }])
+
+    def bulk_upsert_post_visuals(self, rows: list[dict]):
+        """Insert or update visual attributes for many posts in one transaction.
+
+        Each row has the upsert_post_visuals() keys: post_id, dominant, hook
+        and (optionally) all_attributes.
+        """
+        params = []
+        for row in rows:
+            dominant, hook = row["dominant"], row["hook"]
+            all_attributes = row.get("all_attributes")
+            params.append((
+                row["post_id"],
+                *(dominant.get(attr) for attr in DOMINANT_VISUAL_FIELDS),
+                *(hook.get(attr) for attr in HOOK_VISUAL_FIELDS),
+                json.dumps(all_attributes) if all_attributes else "{}",
+            ))
+        with self.conn:
+            self.conn.executemany(_UPSERT_VISUALS_SQL, params)
 
     def get_post_visuals(self, post_id: str) -> Optional[dict]:
         row = self.conn.execute(
@@ -287,9 +421,16 @@ class AnalyticsDB:
         ).fetchone()
         return dict(row) if row else None
 
-    def get_visuals_for_account(self, account_name: str) -> list[dict]:
+    def get_visuals_for_account(self, account_name: str,
+                                columns: Optional[tuple] = None) -> list[dict]:
+        """Visual + performance rows for an account.
+
+        Pass ``columns`` (names from v_visual_performance) to read only those,
+        e.g. to skip the all_attributes_json blob when aggregating.
+        """
+        select = ", ".join(columns) if columns else "*"
         rows = self.conn.execute(
-            "SELECT * FROM v_visual_performance WHERE account_name = ?",
+            f"SELECT {select} FROM v_visual_performance WHERE account_name = ?",
             (account_name,)
         ).fetchall()
         return [dict(r) for r in rows]
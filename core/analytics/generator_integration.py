@@ -20,8 +20,14 @@ def load_performance_context(context_path: Path) -> Optional[dict]:
 
 def weighted_format_choice(available_formats: list[str], format_weights: dict[str, float]) -> str:
     """Choose a format weighted by performance data."""
+    return weighted_format_choices(available_formats, format_weights, 1)[0]
+
+
+def weighted_format_choices(available_formats: list[str], format_weights: dict[str, float],
+                            n: int) -> list[str]:
+    """Draw n formats (with replacement) weighted by performance data, in one call."""
     weights = [format_weights.get(fmt, 1.0) for fmt in available_formats]
-    return random.choices(available_formats, weights=weights, k=1)[0]
+    return random.choices(available_formats, weights=weights, k=n)
 
 
 def get_reference_hooks(context: dict) -> list[str]:
@@ -7,6 +7,7 @@ from typing import Optional
 
 from core.analytics.db import AnalyticsDB
 from core.analytics.analyzer import AccountAnalyzer
+from core.analytics.utils import read_json, write_json_atomic
 from core.llm_client import LLMClient
 
 logger = logging.getLogger(__name__)
@@ -73,16 +74,13 @@ class Recommender:
             max_tokens=2000
         )
 
-        try:
-            recommendations = json.loads(response)
-        except json.JSONDecodeError:
-            start = response.find("[")
-            end = response.rfind("]") + 1
-            if start >= 0 and end > start:
-                recommendations = json.loads(response[start:end])
-            else:
-                logger.error(f"Failed to parse recommendations: {response[:200]}")
-                return []
+        # Clients with structured output can hand back the parsed array directly
+        if isinstance(response, list):
+            recommendations = response
+        else:
+            recommendations = self._parse_recommendations(response)
+        if recommendations is None:
+            return []
 
         stored = []
         for rec in recommendations:
@@ -102,7 +100,7 @@ class Recommender:
     def apply_approved(self, account_name: str, context_path: Path):
         """Apply all approved recommendations to performance_context.json."""
         if context_path.exists():
-            context = json.loads(context_path.read_text())
+            context = read_json(context_path)
         else:
             context = {
                 "last_updated": None,
@@ -118,7 +116,7 @@ class Recommender:
             }
 
         approved = self.db.execute("""
-            SELECT * FROM recommendations
+            SELECT id, insight, proposed_change, approved_at FROM recommendations
             WHERE account_name = ? AND status = 'approved'
             ORDER BY approved_at ASC
         """, (account_name,)).fetchall()
@@ -143,9 +141,22 @@ class Recommender:
         context["last_updated"] = datetime.now().strftime("%Y-%m-%d")
         context["sample_size"] = summary.get("total_posts", 0)
 
-        context_path.write_text(json.dumps(context, indent=2))
+        write_json_atomic(context_path, context)
         logger.info(f"Updated performance context for {account_name}")
 
+    @staticmethod
+    def _parse_recommendations(response: str) -> Optional[list[dict]]:
+        """Parse the LLM's JSON array, tolerating text around it. None if unparseable."""
+        try:
+            return json.loads(response)
+        except json.JSONDecodeError:
+            start = response.find("[")
+            end = response.rfind("]") + 1
+            if start >= 0 and end > start:
+                return json.loads(response[start:end])
+            logger.error(f"Failed to parse recommendations: {response[:200]}")
+            return None
+
     @staticmethod
     def _merge_change(context: dict, change: dict):
         """Deep merge a proposed change into the context."""
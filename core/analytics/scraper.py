@@ -35,35 +35,31 @@ class AccountScraper:
         else:
             raise ValueError(f"Unsupported platform: {platform}")
 
-        new_posts = 0
+        # One lookup for which posts we already have, then one transaction each
+        # for the new posts and the fresh metrics snapshots
+        seen = self.db.get_existing_post_ids([post["post_id"] for post in posts_data])
+        new_rows = []
         updated_posts = 0
 
         for post in posts_data:
             post_id = post["post_id"]
-            existing = self.db.get_post(post_id)
-
-            if existing:
+            if post_id in seen:
                 updated_posts += 1
-            else:
-                new_posts += 1
-                self.db.upsert_post(
-                    account_name=account_name,
-                    platform=platform,
-                    post_id=post_id,
-                    post_url=post.get("url"),
-                    hook_text=post.get("caption", "")[:200],
-                    published_at=post.get("published_at"),
-                )
-
-            # Always insert a fresh metrics snapshot
-            self.db.insert_snapshot(
+                continue
+            seen.add(post_id)
+            new_rows.append(dict(
+                account_name=account_name,
+                platform=platform,
                 post_id=post_id,
-                views=post.get("views", 0),
-                likes=post.get("likes", 0),
-                comments=post.get("comments", 0),
-                shares=post.get("shares", 0),
-                saves=post.get("saves", 0),
-            )
+                post_url=post.get("url"),
+                hook_text=post.get("caption", "")[:200],
+                published_at=post.get("published_at"),
+            ))
+        new_posts = len(new_rows)
+
+        self.db.bulk_upsert_posts(new_rows)
+        # Always insert a fresh metrics snapshot
+        self.db.bulk_insert_snapshots(posts_data)
 
         result = {"new_posts": new_posts, "updated_posts": updated_posts}
         logger.info(f"Done: {new_posts} new, {updated_posts} updated for {account_name}/{platform}")
@@ -0,0 +1,45 @@
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+
+def read_json(path: Path) -> dict:
+    """Load a JSON file. Raises OSError if unreadable, ValueError if malformed."""
+    raw = path.read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def write_json_atomic(path: Path, data: dict):
+    """Write JSON to a temp file beside ``path`` and rename it into place.
+
+    Readers (the generator loads performance_context.json) never see a
+    half-written file. The file keeps the permissions it had; a new one gets
+    the usual ``0o666 & ~umask`` rather than mkstemp's owner-only 0600.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode()
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
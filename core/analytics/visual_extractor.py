@@ -9,6 +9,7 @@ Fast, deterministic, no API cost.
 """
 
 from collections import Counter
+from functools import lru_cache
 
 
 # --- Keyword Maps ---
@@ -82,28 +83,49 @@ ALL_ATTRIBUTE_MAPS = {
 }
 
 
-def classify_attribute(text: str, attribute_map: dict[str, list[str]]) -> list[str]:
-    """Classify text against a keyword map. Returns list of matched values, ordered by match count."""
-    text_lower = text.lower()
+# Keyword maps flattened once into (keyword, value) pairs, in map order
+_KEYWORD_PAIRS = {
+    attr: tuple((kw, value) for value, keywords in attr_map.items() for kw in keywords)
+    for attr, attr_map in ALL_ATTRIBUTE_MAPS.items()
+}
+
+
+def _classify_lowered(text_lower: str, keyword_pairs: tuple) -> list[str]:
     scores = Counter()
-    for value, keywords in attribute_map.items():
-        for kw in keywords:
-            if kw in text_lower:
-                scores[value] += 1
+    for kw, value in keyword_pairs:
+        if kw in text_lower:
+            scores[value] += 1
     return [val for val, _ in scores.most_common()]
 
 
+def classify_attribute(text: str, attribute_map: dict[str, list[str]]) -> list[str]:
+    """Classify text against a keyword map. Returns list of matched values, ordered by match count."""
+    return _classify_lowered(
+        text.lower(),
+        tuple((kw, value) for value, keywords in attribute_map.items() for kw in keywords),
+    )
+
+
+@lru_cache(maxsize=2048)
+def _extract_cached(prompt_str: str) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    # Lowercase once and scan the pre-flattened keyword tables for all 7 attributes.
+    # Results are frozen so the cache can hand them out safely; slides across posts
+    # share a lot of boilerplate phrasing, so repeats are common.
+    text_lower = prompt_str.lower()
+    result = []
+    for attr_name, keyword_pairs in _KEYWORD_PAIRS.items():
+        matches = _classify_lowered(text_lower, keyword_pairs)
+        if matches:
+            result.append((attr_name, tuple(matches)))
+    return tuple(result)
+
+
 def extract_from_prompt(prompt_str: str) -> dict[str, list[str]]:
     """Extract all 7 visual attributes from a single image prompt string.
 
     Returns dict mapping attribute name -> list of matched values (ordered by strength).
     """
-    result = {}
-    for attr_name, attr_map in ALL_ATTRIBUTE_MAPS.items():
-        matches = classify_attribute(prompt_str, attr_map)
-        if matches:
-            result[attr_name] = matches
-    return result
+    return {attr_name: list(values) for attr_name, values in _extract_cached(prompt_str)}
 
 
 def extract_from_post(image_prompts: list[str]) -> dict:
@@ -136,8 +158,7 @@ def extract_from_post(image_prompts: list[str]) -> dict:
     attribute_counters = {attr: Counter() for attr in ALL_ATTRIBUTE_MAPS}
 
     for prompt in image_prompts:
-        slide_attrs = extract_from_prompt(prompt)
-        for attr_name, values in slide_attrs.items():
+        for attr_name, values in _extract_cached(prompt):
             # Weight by position: first match in a slide gets more weight
             for i, val in enumerate(values):
                 attribute_counters[attr_name][val] += max(1, len(values) - i)
@@ -149,11 +170,7 @@ def extract_from_post(image_prompts: list[str]) -> dict:
             dominant[attr_name] = counter.most_common(1)[0][0]
 
     # Hook slide = first prompt
-    hook_attrs = extract_from_prompt(image_prompts[0]) if image_prompts else {}
-    hook = {}
-    for attr_name, values in hook_attrs.items():
-        if values:
-            hook[attr_name] = values[0]
+    hook = {attr_name: values[0] for attr_name, values in _extract_cached(image_prompts[0])}
 
     # Serialize counters for storage
     all_attributes = {
@@ -3,12 +3,29 @@ Semantic Hook Scoring
 Uses embeddings to evaluate hook quality without hardcoded keywords
 """
 
+import hashlib
 import os
 import re
+import tempfile
+from pathlib import Path
+from collections import OrderedDict
 from typing import List, Tuple, Dict
 import numpy as np
 import requests
-from functools import lru_cache
+
+
+EMBEDDING_CACHE_DIR = Path(__file__).parent / "_emb_cache"
+
+# A capitalized word of 2+ characters anywhere after the first word (ASCII text)
+_MIDCAP = re.compile(r'\S\s+[A-Z]\S')
+
+
+def _has_midsentence_capital(hook: str) -> bool:
+    """True if any word after the first (2+ characters) starts with a capital"""
+    if hook.isascii():
+        return _MIDCAP.search(hook) is not None
+    # Accented capitals (É, Ñ, ...) need str.isupper()
+    return any(word[0].isupper() for word in hook.split()[1:] if len(word) > 1)
 
 
 class SemanticHookScorer:
@@ -64,7 +81,26 @@ class SemanticHookScorer:
         ]
     }
 
-    def __init__(self, api_key: str = None, use_openrouter: bool = True, custom_references: Dict = None):
+    # Similarity cut-offs for scores 2, 3, 4 and 5 (below the first scores 1)
+    # Calibrated against real text-embedding-3-small outputs:
+    #   Cross-domain hooks: 0.19-0.34, Same-niche hooks: 0.35-0.50, Near-match: 0.50-0.70+
+    _THRESHOLDS = np.array([0.20, 0.28, 0.35, 0.45])
+
+    # Reference rows compared per block before checking for a top-score match
+    _EARLY_EXIT_BLOCK = 8
+
+    # Matryoshka-truncated embedding size requested from text-embedding-3-small
+    EMBEDDING_DIMENSIONS = 512
+
+    # Per-request limits when sending several texts to the embeddings endpoint
+    MAX_BATCH_TOKENS = 8000
+    MAX_BATCH_INPUTS = 2048
+
+    # Maximum number of embeddings kept in memory per scorer
+    MEMORY_CACHE_SIZE = 1000
+
+    def __init__(self, api_key: str = None, use_openrouter: bool = True, custom_references: Dict = None,
+                 cache_dir: Path = EMBEDDING_CACHE_DIR):
         """
         Initialize with OpenAI API or OpenRouter
 
@@ -72,6 +108,7 @@ class SemanticHookScorer:
             api_key: API key (defaults to env vars)
             use_openrouter: If True, use OpenRouter; else use OpenAI directly
             custom_references: Optional niche-specific reference examples to merge with defaults
+            cache_dir: Directory for the on-disk embedding cache (None disables it)
         """
         if use_openrouter:
             self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
@@ -85,6 +122,20 @@ class SemanticHookScorer:
         if not self.api_key:
             raise ValueError("No API key found. Set OPENROUTER_API_KEY or OPENAI_API_KEY")
 
+        # Persistent session so repeated embedding calls reuse one connection
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Stacked, normalized reference embeddings (built lazily on first score)
+        self._ref_all = None
+        self._ref_slices: Dict[str, slice] = {}
+
         # Merge references: niche-specific first (higher priority), then defaults
         self.reference_examples = {k: list(v) for k, v in self.REFERENCE_EXAMPLES.items()}
         if custom_references:
@@ -94,10 +145,52 @@ class SemanticHookScorer:
                         examples + self.reference_examples[dimension]
                     )
 
-    @lru_cache(maxsize=1000)
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _cache_path(self, text: str) -> Path:
+        """Disk cache location for an embedding, keyed by model, size and text"""
+        key = hashlib.sha256(
+            f"{self.model}:{self.EMBEDDING_DIMENSIONS}\0{text}".encode()
+        ).hexdigest()
+        return self.cache_dir / f"{key}.npy"
+
+    def _load_cached_embedding(self, text: str):
+        """Load an embedding from the disk cache, or None on a miss"""
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(text)
+        if not path.exists():
+            return None
+        try:
+            return np.load(path).astype(np.float32)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached_embedding(self, text: str, embedding: np.ndarray):
+        """Write an embedding to the disk cache (float16, atomic rename)"""
+        if not self.cache_dir:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding.astype(np.float16))
+            os.replace(tmp_path, self._cache_path(text))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
     def _get_embedding(self, text: str) -> np.ndarray:
         """
-        Get embedding for text (with caching)
+        Get embedding for text (with in-memory and on-disk caching)
 
         Args:
             text: Text to embed
@@ -105,19 +198,78 @@ class SemanticHookScorer:
         Returns:
             Embedding vector as numpy array
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        return self._get_embeddings_batch([text])[0]
+
+    def _get_embeddings_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Get embeddings for several texts, requesting all cache misses in one API call
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        embeddings: Dict[str, np.ndarray] = {}
+        misses = []
+        for text in dict.fromkeys(texts):
+            cached = self._memory_cache.get(text)
+            if cached is None:
+                cached = self._load_cached_embedding(text)
+            if cached is None:
+                misses.append(text)
+            else:
+                embeddings[text] = cached
+
+        for batch in self._pack_batches(misses):
+            for text, embedding in zip(batch, self._fetch_embeddings(batch)):
+                self._store_cached_embedding(text, embedding)
+                embeddings[text] = embedding
+
+        for text, embedding in embeddings.items():
+            self._remember_embedding(text, embedding)
+
+        return [embeddings[text] for text in texts]
+
+    def _pack_batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Greedily group texts into requests of up to MAX_BATCH_TOKENS estimated tokens
 
+        Tokens are estimated as ~4 characters each; a single oversize text still
+        gets its own request.
+        """
+        batches = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = len(text) // 4 + 1
+            if current and (current_tokens + tokens > self.MAX_BATCH_TOKENS
+                            or len(current) >= self.MAX_BATCH_INPUTS):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _remember_embedding(self, text: str, embedding: np.ndarray):
+        """Keep an embedding in the bounded in-memory LRU cache"""
+        self._memory_cache[text] = embedding
+        self._memory_cache.move_to_end(text)
+        if len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+    def _fetch_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Request embeddings for texts from the API in a single call"""
         data = {
             "model": self.model,
-            "input": text
+            "input": texts,
+            "dimensions": self.EMBEDDING_DIMENSIONS
         }
 
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/embeddings",
-            headers=headers,
             json=data,
             timeout=30
         )
@@ -126,12 +278,12 @@ class SemanticHookScorer:
             raise RuntimeError(f"Embedding API error: {response.status_code} - {response.text}")
 
         result = response.json()
-        embedding = result["data"][0]["embedding"]
-        return np.array(embedding)
+        items = sorted(result["data"], key=lambda item: item.get("index", 0))
+        return [np.asarray(item["embedding"], dtype=np.float32) for item in items]
 
     def _similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
         """Cosine similarity between two embeddings"""
-        return np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
+        return float(np.dot(emb1, emb2) / np.sqrt(np.vdot(emb1, emb1) * np.vdot(emb2, emb2)))
 
     def score_dimension(self, hook: str, dimension: str, debug: bool = False) -> int:
         """
@@ -148,35 +300,60 @@ class SemanticHookScorer:
         if dimension not in self.reference_examples:
             return 2  # Default
 
+        return self._score_dimension_from_emb(self._hook_embedding(hook), dimension, debug)
+
+    def _hook_embedding(self, hook: str) -> np.ndarray:
+        """Normalized embedding of the lowercased hook"""
+        self._build_reference_matrix()
         hook_emb = self._get_embedding(hook.lower())
-        reference_examples = self.reference_examples[dimension]
-
-        # Get max similarity to any reference example
-        max_similarity = 0.0
-        best_example = ""
-        for example in reference_examples:
-            example_emb = self._get_embedding(example)
-            similarity = self._similarity(hook_emb, example_emb)
-            if similarity > max_similarity:
-                max_similarity = similarity
-                best_example = example
+        return hook_emb / np.linalg.norm(hook_emb)
+
+    def _score_dimension_from_emb(self, hook_emb: np.ndarray, dimension: str,
+                                  debug: bool = False) -> int:
+        """Score one dimension from an already-normalized hook embedding"""
+        refs = self._ref_all[self._ref_slices[dimension]]
+
+        # Compare in small blocks and stop once a match reaches the top bucket
+        best = 0
+        max_similarity = -1.0
+        for start in range(0, len(refs), self._EARLY_EXIT_BLOCK):
+            sims = refs[start:start + self._EARLY_EXIT_BLOCK] @ hook_emb
+            block_best = int(sims.argmax())
+            if sims[block_best] > max_similarity:
+                best = start + block_best
+                max_similarity = float(sims[block_best])
+            if max_similarity >= self._THRESHOLDS[-1]:
+                break
 
         if debug:
+            best_example = self.reference_examples[dimension][best]
             print(f"  [{dimension}] max_sim={max_similarity:.3f}, best='{best_example[:50]}...'")
 
-        # Convert similarity (0-1) to score (0-5)
-        # Calibrated against real text-embedding-3-small outputs:
-        #   Cross-domain hooks: 0.19-0.34, Same-niche hooks: 0.35-0.50, Near-match: 0.50-0.70+
-        if max_similarity >= 0.45:
-            return 5
-        elif max_similarity >= 0.35:
-            return 4
-        elif max_similarity >= 0.28:
-            return 3
-        elif max_similarity >= 0.20:
-            return 2
-        else:
-            return 1
+        return self._similarity_to_score(max_similarity)
+
+    def _similarity_to_score(self, max_similarity: float) -> int:
+        """Convert similarity (0-1) to score (0-5)"""
+        return int(np.searchsorted(self._THRESHOLDS, max_similarity, side="right") + 1)
+
+    def warm_up(self):
+        """Embed the reference examples now rather than on the first score"""
+        self._build_reference_matrix()
+
+    def _build_reference_matrix(self):
+        """
+        Stack every dimension's reference embeddings into one normalized
+        (total_refs, d) matrix, remembering each dimension's row slice
+        """
+        if self._ref_all is not None:
+            return
+
+        texts = []
+        for dimension, examples in self.reference_examples.items():
+            self._ref_slices[dimension] = slice(len(texts), len(texts) + len(examples))
+            texts.extend(examples)
+
+        ref_all = np.vstack(self._get_embeddings_batch(texts)).astype(np.float32)
+        self._ref_all = ref_all / np.linalg.norm(ref_all, axis=1, keepdims=True)
 
     def score_hook(self, hook: str) -> Tuple[int, List[str]]:
         """
@@ -185,15 +362,46 @@ class SemanticHookScorer:
         Returns:
             (total_score, feedback_list)
         """
-        scores = {}
-        feedback = []
+        return self.score_hooks([hook])[0]
+
+    def score_hooks(self, hooks: List[str]) -> List[Tuple[int, List[str]]]:
+        """
+        Score several hooks at once, embedding all unseen hooks in one API call
+
+        Args:
+            hooks: Hook texts to score
+
+        Returns:
+            (total_score, feedback_list) for each hook, in input order
+        """
+        if not hooks:
+            return []
+
+        self._build_reference_matrix()
+        unique_texts = list(dict.fromkeys(hook.lower() for hook in hooks))
+        embs = np.vstack(self._get_embeddings_batch(unique_texts)).astype(np.float32)
+        embs /= np.linalg.norm(embs, axis=1, keepdims=True)
 
-        # Score each dimension
+        # (n_unique, total_refs) similarities, then best match per dimension
+        sims = embs @ self._ref_all.T
         dimensions = ["curiosity_gap", "actionability", "specificity", "scroll_stop"]
-        for dimension in dimensions:
-            score = self.score_dimension(hook, dimension)
-            scores[dimension] = score
+        max_by_dim = np.column_stack(
+            [sims[:, self._ref_slices[dim]].max(axis=1) for dim in dimensions]
+        )
+        dim_scores = (np.searchsorted(self._THRESHOLDS, max_by_dim, side="right") + 1).tolist()
+        row_for_text = {text: i for i, text in enumerate(unique_texts)}
+
+        results = []
+        for hook in hooks:
+            scores = dict(zip(dimensions, dim_scores[row_for_text[hook.lower()]]))
+            results.append((sum(scores.values()), self._build_feedback(hook, scores)))
+        return results
+
+    def _build_feedback(self, hook: str, scores: Dict[str, int]) -> List[str]:
+        """Feedback for low-scoring dimensions and style issues"""
+        feedback = []
 
+        for dimension, score in scores.items():
             # Generate feedback if score is low
             if score < 3:
                 dim_name = dimension.replace('_', ' ').title()
@@ -204,13 +412,11 @@ class SemanticHookScorer:
                     f"Examples: '{examples[0]}' or '{examples[1]}'"
                 )
 
-        total = sum(scores.values())
-
         # Add style feedback
-        if any(word[0].isupper() and i > 0 for i, word in enumerate(hook.split()) if len(word) > 1):
+        if _has_midsentence_capital(hook):
             feedback.append("Style violation: Avoid capitalizing words mid-sentence")
 
-        return total, feedback
+        return feedback
 
     def get_dimension_breakdown(self, hook: str) -> Dict[str, int]:
         """
@@ -219,7 +425,8 @@ class SemanticHookScorer:
         Returns:
             Dict mapping dimension names to scores
         """
-        scores = {}
-        for dimension in ["curiosity_gap", "actionability", "specificity", "scroll_stop"]:
-            scores[dimension] = self.score_dimension(hook, dimension)
-        return scores
+        hook_emb = self._hook_embedding(hook)
+        return {
+            dimension: self._score_dimension_from_emb(hook_emb, dimension)
+            for dimension in ["curiosity_gap", "actionability", "specificity", "scroll_stop"]
+        }
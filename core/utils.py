@@ -6,10 +6,28 @@ Copied from automation repo for standalone operation
 import re
 import unicodedata
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Set, List, Dict
+from typing import Set, List, Dict, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+
+# Slug cleanup patterns
+_SLUG_STRIP = re.compile(r'[^\w\s-]')
+_SLUG_DASH = re.compile(r'[-\s]+')
+
+# Common stopwords ignored when comparing topics
+_TOPIC_STOPWORDS = frozenset({
+    'when', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+    'to', 'for', 'of', 'with', 'by', 'from', 'your', 'their', 'about',
+    'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had'
+})
+
 
 class SlugGenerator:
     """Generates URL-friendly slugs from text"""
@@ -23,6 +41,8 @@ class SlugGenerator:
         """
         self.max_length = max_length
         self.used_slugs: Set[str] = set()
+        # Next suffix to try for each base slug that has collided
+        self._next_suffix: Dict[str, int] = {}
 
     def generate(self, text: str, ensure_unique: bool = False) -> str:
         """
@@ -43,15 +63,16 @@ class SlugGenerator:
         # Lowercase
         slug = text.lower()
 
-        # Remove unicode accents
-        slug = unicodedata.normalize('NFKD', slug)
-        slug = slug.encode('ascii', 'ignore').decode('ascii')
+        # Remove unicode accents (ASCII text has nothing to strip)
+        if not slug.isascii():
+            slug = unicodedata.normalize('NFKD', slug)
+            slug = slug.encode('ascii', 'ignore').decode('ascii')
 
         # Remove special characters (keep alphanumeric, spaces, hyphens)
-        slug = re.sub(r'[^\w\s-]', '', slug)
+        slug = _SLUG_STRIP.sub('', slug)
 
         # Replace whitespace and multiple spaces with single hyphen
-        slug = re.sub(r'[-\s]+', '-', slug)
+        slug = _SLUG_DASH.sub('-', slug)
 
         # Remove leading/trailing hyphens
         slug = slug.strip('-')
@@ -84,18 +105,20 @@ class SlugGenerator:
             self.used_slugs.add(slug)
             return slug
 
-        # Add number suffix
-        counter = 2
-        while True:
-            numbered_slug = f"{slug}-{counter}"
-            if numbered_slug not in self.used_slugs:
-                self.used_slugs.add(numbered_slug)
-                return numbered_slug
+        # Add number suffix, resuming after the last one handed out
+        counter = self._next_suffix.get(slug, 2)
+        while f"{slug}-{counter}" in self.used_slugs:
             counter += 1
+        self._next_suffix[slug] = counter + 1
+
+        numbered_slug = f"{slug}-{counter}"
+        self.used_slugs.add(numbered_slug)
+        return numbered_slug
 
     def reset(self):
         """Clear tracking of used slugs"""
         self.used_slugs.clear()
+        self._next_suffix.clear()
 
 
 class TopicTracker:
@@ -117,6 +140,12 @@ class TopicTracker:
         history_dir.mkdir(parents=True, exist_ok=True)
         self.history_file = history_dir / "topic_history.json"
 
+        # Parsed history and the file (mtime, size) it was read at
+        self._cached: Optional[Dict] = None
+        self._cached_key: Optional[tuple] = None
+        # Key-term sets of the most recent topics, rebuilt when history changes
+        self._recent_term_sets: Optional[List[tuple]] = None
+
         self._ensure_history_file()
 
     def _ensure_history_file(self):
@@ -130,12 +159,31 @@ class TopicTracker:
             })
 
     def load_history(self) -> Dict:
-        """Load topic history from file"""
+        """Load topic history (re-reads the file only when it has changed)"""
+        history = self._load_cached()
+        return {**history, "topics": list(history.get("topics", []))}
+
+    def _load_cached(self) -> Dict:
+        """The cached history itself; callers must not mutate it"""
         try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+            st = self.history_file.stat()
+            # Size as well as mtime: a same-tick rewrite on a filesystem with
+            # coarse timestamps keeps the mtime
+            key = (st.st_mtime_ns, st.st_size)
+            if self._cached is not None and key == self._cached_key:
+                return self._cached
+            if orjson is not None:
+                self._cached = orjson.loads(self.history_file.read_bytes())
+            else:
+                with open(self.history_file, 'r') as f:
+                    self._cached = json.load(f)
+            self._cached_key = key
+            self._recent_term_sets = None
+            return self._cached
+        except (ValueError, FileNotFoundError):
             # Corrupted or missing - recreate
+            self._cached = None
+            self._recent_term_sets = None
             return {
                 "version": "1.0",
                 "account": self.account_name,
@@ -145,8 +193,16 @@ class TopicTracker:
 
     def save_history(self, history: Dict):
         """Save topic history to file"""
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        if orjson is not None:
+            self.history_file.write_bytes(orjson.dumps(history, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.history_file, 'w') as f:
+                json.dump(history, f, indent=2)
+        # Only cache what is known to be on disk
+        st = self.history_file.stat()
+        self._cached = {**history, "topics": list(history.get("topics", []))}
+        self._cached_key = (st.st_mtime_ns, st.st_size)
+        self._recent_term_sets = None
 
     def add_topic(self, topic: str, output_dir: str):
         """
@@ -156,15 +212,15 @@ class TopicTracker:
             topic: Topic string
             output_dir: Path to output directory
         """
-        history = self.load_history()
-        history["topics"].insert(0, {
+        history = self._load_cached()
+        entry = {
             "topic": topic,
             "generated_at": datetime.now().isoformat(),
             "output_dir": str(output_dir)
-        })
-        # Keep only most recent N topics
-        history["topics"] = history["topics"][:self.max_history]
-        self.save_history(history)
+        }
+        # Keep only most recent N topics. Built as a new dict so the cache is
+        # untouched if the write fails
+        self.save_history({**history, "topics": [entry, *history["topics"]][:self.max_history]})
 
     def get_recent_topics(self, n: int = None) -> List[str]:
         """
@@ -176,8 +232,7 @@ class TopicTracker:
         Returns:
             List of topic strings
         """
-        history = self.load_history()
-        topics = history.get("topics", [])
+        topics = self._load_cached().get("topics", [])
         if n:
             topics = topics[:n]
         return [t["topic"] for t in topics]
@@ -207,20 +262,16 @@ class TopicTracker:
         Returns:
             (is_similar, similar_topic_found)
         """
-        recent_topics = self.get_recent_topics(n=5)  # Check last 5 topics
-
         # Extract key terms from new topic
-        new_terms = set(self._extract_key_terms(new_topic.lower()))
-
-        for recent in recent_topics:
-            recent_terms = set(self._extract_key_terms(recent.lower()))
+        new_terms = frozenset(self._extract_key_terms(new_topic.lower()))
 
+        for recent, recent_terms in self._get_recent_term_sets():
             # Calculate Jaccard similarity
             if len(new_terms) == 0 or len(recent_terms) == 0:
                 continue
 
             intersection = len(new_terms & recent_terms)
-            union = len(new_terms | recent_terms)
+            union = len(new_terms) + len(recent_terms) - intersection
             similarity = intersection / union if union > 0 else 0
 
             if similarity >= similarity_threshold:
@@ -228,26 +279,45 @@ class TopicTracker:
 
         return (False, None)
 
+    def _get_recent_term_sets(self) -> List[tuple]:
+        """(topic, key-term set) pairs for the last 5 topics, cached per history version"""
+        recent_topics = self.get_recent_topics(n=5)  # Check last 5 topics
+        if self._recent_term_sets is None:
+            self._recent_term_sets = [
+                (recent, frozenset(self._extract_key_terms(recent.lower())))
+                for recent in recent_topics
+            ]
+        return self._recent_term_sets
+
     def _extract_key_terms(self, text: str) -> List[str]:
         """Extract key terms from topic (remove stopwords)"""
-        # Common stopwords to ignore
-        stopwords = {
-            'when', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
-            'to', 'for', 'of', 'with', 'by', 'from', 'your', 'their', 'about',
-            'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had'
-        }
-
         # Split and clean
         words = text.replace("'", " ").split()
         key_terms = [
             w.strip('.,!?()[]{}";:')
             for w in words
-            if w.lower() not in stopwords and len(w) > 2
+            if w.lower() not in _TOPIC_STOPWORDS and len(w) > 2
         ]
 
         return key_terms
 
 
+# Keywords that suggest step-by-step sequential content
+STEP_GUIDE_KEYWORDS = frozenset({
+    'guide', 'how to', 'method', 'methods', 'schedule', 'timeline',
+    'building', 'training', 'process', 'steps', 'order', 'sequence',
+    'introduction', 'transition', 'first'
+})
+
+# Keywords that suggest list-based tips/collection content
+HABIT_LIST_KEYWORDS = frozenset({
+    'tips', 'ideas', 'activities', 'milestones', 'checklist',
+    'strategies', 'solutions', 'relief', 'by age', 'by month',
+    'dynamics', 'development', 'gear', 'items', 'essentials'
+})
+
+
+@lru_cache(maxsize=4096)
 def determine_content_format(topic: str) -> str:
     """
     Intelligently select format based on topic keywords.
@@ -272,24 +342,11 @@ def determine_content_format(topic: str) -> str:
         'habit_list'
     """
 
-    # Keywords that suggest step-by-step sequential content
-    STEP_GUIDE_KEYWORDS = {
-        'guide', 'how to', 'method', 'methods', 'schedule', 'timeline',
-        'building', 'training', 'process', 'steps', 'order', 'sequence',
-        'introduction', 'transition', 'first'
-    }
-
-    # Keywords that suggest list-based tips/collection content
-    HABIT_LIST_KEYWORDS = {
-        'tips', 'ideas', 'activities', 'milestones', 'checklist',
-        'strategies', 'solutions', 'relief', 'by age', 'by month',
-        'dynamics', 'development', 'gear', 'items', 'essentials'
-    }
-
     topic_lower = topic.lower()
-    topic_tokens = set(topic_lower.replace('-', ' ').split())
 
-    # Score both formats by counting keyword matches
+    # Score both formats by counting keyword matches. Substring matching is
+    # deliberate: stems count too ('guide' in 'guides', 'transition' in
+    # 'transitions'); results are memoized per topic instead
     step_guide_score = sum(1 for keyword in STEP_GUIDE_KEYWORDS
                            if keyword in topic_lower)
     habit_list_score = sum(1 for keyword in HABIT_LIST_KEYWORDS
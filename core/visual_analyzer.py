@@ -6,28 +6,268 @@ Classifies post type and extracts visual details per slide.
 """
 
 import base64
+import copy
+import hashlib
+import io
 import json
 import logging
+import math
 import os
-from typing import Optional
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional
 
 import httpx
 import requests
 from openai import OpenAI
+from PIL import Image, UnidentifiedImageError
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx when installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 MAX_IMAGES = 10
 
+VISUAL_CACHE_DIR = Path(__file__).parent.parent / "data" / "visual_cache"
+VISUAL_CACHE_TTL = 30 * 86400  # seconds
+MEMORY_CACHE_SIZE = 256
+IMAGE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Eviction trims to this fraction of the cap so the next few writes don't rescan
+IMAGE_CACHE_LOW_WATER = 0.9
+
+DATA_URL_PREFIX = b"data:image/jpeg;base64,"
+
+# Longest side sent to GPT-4o; larger images are downscaled and re-encoded as JPEG
+MAX_IMAGE_SIDE = 1024
+JPEG_QUALITY = 85
+
+# Stitched slide grids: gap between slides and the longest side of the whole grid
+GRID_GAP = 5
+MAX_GRID_SIDE = 2048
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Transient image-host failures (timeouts, connection resets, 5xx) are retried
+# with exponential backoff before a slide is dropped
+DOWNLOAD_RETRY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=[500, 502, 503, 504],
+    allowed_methods=["GET"],
+    raise_on_status=False,
+)
+
+
+ANALYSIS_PROMPT = """Analyze these {num_images} image(s) from a social media post and return a JSON object with the following structure.
+{layout_note}
+POST CAPTION (for context):
+\"\"\"{caption}\"\"\"
+
+INSTRUCTIONS:
+1. Extract ALL text overlays exactly as written (verbatim) from each slide.
+2. Describe what each image actually shows (subjects, actions, setting).
+3. Classify the post type based on the balance of text vs visuals.
+4. Identify the visual style (colors, fonts, layout patterns).
+5. For visual-first posts: describe the visual narrative/progression across slides.
+
+POST TYPE CLASSIFICATION CRITERIA:
+- "text_heavy": Text IS the content, images are backgrounds/decoration. Most slides have text overlays.
+- "hybrid": Text and visuals work together. Some slides have text, visuals support/illustrate.
+- "visual_first": Visuals ARE the content. Little or no text on slides.
+- "photo_dump": Curated photo collection. No text on slides, photos tell the story.
+- "meme_quote": Single text block per slide on aesthetic background. Quote or meme format.
+- "infographic": Data, charts, or diagrams. Information design focused.
+
+REQUIRED JSON OUTPUT:
+{{
+    "post_type": "text_heavy|hybrid|visual_first|photo_dump|meme_quote|infographic",
+    "text_density": "high|medium|low|none",
+    "slide_count": {num_images},
+    "slides": [
+        {{
+            "slide_number": 1,
+            "text_overlays": ["exact text on this slide"],
+            "visual_description": "what the image actually shows",
+            "subjects": ["people", "objects", "scenes depicted"],
+            "mood": "emotional tone",
+            "layout": "how elements are arranged (e.g. centered_text_over_photo, text_on_solid_bg, full_photo, split_layout)",
+            "dominant_colors": ["#hex1", "#hex2"],
+            "font_style": "bold_sans_serif|handwritten|serif|null if no text",
+            "text_position": "center|top|bottom|left|right|null if no text",
+            "text_styling": {{
+                "headline_size": "large|medium|small|null if no headline",
+                "body_size": "large|medium|small|null if no body text",
+                "text_color": "#hex color of main text",
+                "headline_color": "#hex color of headline if different from body, else null",
+                "text_weight": "bold|regular|light|mixed",
+                "text_case": "uppercase|lowercase|title_case|sentence_case|mixed",
+                "text_effects": ["shadow", "outline", "glow", "none"],
+                "background_treatment": "semi_transparent_overlay|solid_color_block|gradient|none|blurred_photo",
+                "text_to_image_ratio": 0.5,
+                "text_hierarchy": "describe how text sizes/weights create visual hierarchy (e.g. 'large bold header, smaller regular body below')"
+            }}
+        }}
+    ],
+    "overall_visual_style": {{
+        "aesthetic": "free-form description of the visual aesthetic",
+        "color_palette": ["#hex1", "#hex2", "#hex3"],
+        "consistency": "how slides relate visually to each other",
+        "visual_narrative": "for visual-first posts: how the image sequence tells a story",
+        "brand_elements": "logos, watermarks, recurring visual motifs"
+    }}
+}}
+
+Return one slide object per image, numbered sequentially. Be precise with text overlays and hex color codes."""
+
+
+VALID_POST_TYPES = frozenset({
+    "text_heavy",
+    "hybrid",
+    "visual_first",
+    "photo_dump",
+    "meme_quote",
+    "infographic",
+})
+
+
+class RawTextStyling(BaseModel):
+    """Lenient per-slide text styling as returned by GPT-4o."""
+    headline_size: Any = None
+    body_size: Any = None
+    text_color: Any = None
+    headline_color: Any = None
+    text_weight: Any = None
+    text_case: Any = None
+    text_effects: Any = Field(default_factory=lambda: ["none"])
+    background_treatment: Any = "none"
+    text_to_image_ratio: Any = 0.0
+    text_hierarchy: Any = ""
+
+
+class RawSlide(BaseModel):
+    """Lenient per-slide analysis as returned by GPT-4o."""
+    slide_number: Any = None
+    text_overlays: Any = Field(default_factory=list)
+    visual_description: Any = ""
+    subjects: Any = Field(default_factory=list)
+    mood: Any = ""
+    layout: Any = ""
+    dominant_colors: Any = Field(default_factory=list)
+    font_style: Any = None
+    text_position: Any = None
+    text_styling: RawTextStyling = Field(default_factory=RawTextStyling)
+
+    @field_validator("text_styling", mode="before")
+    @classmethod
+    def _null_styling(cls, value):
+        return value or {}
+
+
+class RawOverallStyle(BaseModel):
+    """Lenient overall visual style as returned by GPT-4o."""
+    aesthetic: Any = ""
+    color_palette: Any = Field(default_factory=list)
+    consistency: Any = ""
+    visual_narrative: Any = ""
+    brand_elements: Any = ""
+
+
+class RawVisualAnalysis(BaseModel):
+    """Lenient top-level GPT-4o response, decoded and defaulted in one pass.
+
+    Leaf values are left untyped so an odd value from the model never fails the
+    whole analysis; only the structure and defaults are enforced here.
+    """
+    post_type: Any = "visual_first"
+    text_density: Any = "none"
+    slide_count: Any = None
+    slides: List[RawSlide] = Field(default_factory=list)
+    overall_visual_style: RawOverallStyle = Field(default_factory=RawOverallStyle)
+
+    @field_validator("slides", "overall_visual_style", mode="before")
+    @classmethod
+    def _null_container(cls, value, info):
+        if value is None:
+            return [] if info.field_name == "slides" else {}
+        return value
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a bytes-like object, without copying it.
+
+    io.BytesIO copies a bytearray on construction; PIL only needs read/seek.
+    """
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+@lru_cache(maxsize=1)
+def _get_client(api_key: str) -> OpenAI:
+    """Process-wide OpenRouter client so every analyzer shares one connection pool."""
+    http_client = httpx.Client(
+        timeout=60.0,
+        follow_redirects=True,
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    )
+    return OpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=api_key,
+        http_client=http_client,
+    )
+
 
 class VisualAnalyzer:
     """Analyzes post images with GPT-4o to classify post type and extract visual details."""
 
-    def __init__(self, openrouter_key: str = None):
+    def __init__(
+        self,
+        openrouter_key: str = None,
+        cache_dir: Optional[Path] = VISUAL_CACHE_DIR,
+        stitch_slides: bool = False,
+    ):
         """Initialize OpenRouter client.
 
         Args:
             openrouter_key: OpenRouter API key. Falls back to OPENROUTER_API_KEY env var.
+            cache_dir: Directory for cached analyses. None disables the cache.
+            stitch_slides: Send carousels as one grid image instead of one image per slide.
+                Cheaper, but small overlay text may become harder to read.
         """
         self.api_key = openrouter_key or os.environ.get("OPENROUTER_API_KEY")
         if not self.api_key:
@@ -35,12 +275,22 @@ class VisualAnalyzer:
                 "OpenRouter API key required. Pass openrouter_key or set OPENROUTER_API_KEY."
             )
 
-        http_client = httpx.Client(timeout=60.0, follow_redirects=True)
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key,
-            http_client=http_client,
+        self.client = _get_client(self.api_key)
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.stitch_slides = stitch_slides
+        # Session-scoped (urls, caption) -> analysis cache; resets per process
+        self._memory_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        # Running size of the encoded-image cache; seeded from disk on first write
+        self._encoded_bytes: Optional[int] = None
+
+        # Keep-alive session sized so every slide can download in parallel
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=MAX_IMAGES, pool_maxsize=MAX_IMAGES, max_retries=DOWNLOAD_RETRY
         )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
     def analyze_post(self, image_urls: list, caption: str) -> dict:
         """Main entry: download images, analyze with GPT-4o, classify post type.
@@ -59,6 +309,27 @@ class VisualAnalyzer:
             logger.warning("No image URLs provided, returning empty analysis")
             return self._empty_result()
 
+        key = (tuple(image_urls[:MAX_IMAGES]), caption)
+        if key in self._memory_cache:
+            self._memory_cache.move_to_end(key)
+            return copy.deepcopy(self._memory_cache[key])
+
+        result, complete = self._analyze_post_uncached(image_urls, caption)
+        # A partial download must not stand in for the full URL list
+        if result["slides"] and complete:
+            self._memory_cache[key] = copy.deepcopy(result)
+            if len(self._memory_cache) > MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
+        return result
+
+    def _analyze_post_uncached(self, image_urls: list, caption: str) -> tuple:
+        """Download and analyze a post, consulting only the on-disk cache.
+
+        Returns:
+            (analysis, complete) where complete is False if some slides
+            failed to download, so the result does not cover every URL.
+        """
+
         # Cap carousel size
         urls_to_process = image_urls[:MAX_IMAGES]
         if len(image_urls) > MAX_IMAGES:
@@ -66,66 +337,285 @@ class VisualAnalyzer:
                 "Capping image count from %d to %d", len(image_urls), MAX_IMAGES
             )
 
-        # Download all images
-        images_base64 = []
-        for url in urls_to_process:
-            img_data = self._download_image(url)
-            if img_data:
-                img_b64 = base64.b64encode(img_data).decode("utf-8")
-                images_base64.append(img_b64)
-            else:
-                logger.warning("Failed to download image: %s", url)
-
-        if not images_base64:
+        url_key = self._cache_key(caption, [url.encode() for url in urls_to_process])
+        cached = self._load_cached(url_key)
+        if cached is not None:
+            logger.info("Using cached visual analysis for %d image(s)", len(urls_to_process))
+            return cached, True
+
+        # Reuse images encoded on an earlier attempt; download the rest concurrently
+        data_urls = [self._load_encoded(url) for url in urls_to_process]
+        missing = [i for i, data_url in enumerate(data_urls) if data_url is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                downloads = list(
+                    executor.map(self._download_image, [urls_to_process[i] for i in missing])
+                )
+            for i, img_data in zip(missing, downloads):
+                if img_data:
+                    data_urls[i] = self._to_data_url(self._prepare_image(img_data))
+                    self._store_encoded(urls_to_process[i], data_urls[i])
+                else:
+                    logger.warning("Failed to download image: %s", urls_to_process[i])
+            self._evict_encoded()
+
+        data_urls = [data_url for data_url in data_urls if data_url]
+        if not data_urls:
             logger.error("No images downloaded successfully")
-            return self._empty_result()
+            return self._empty_result(), False
+        complete = len(data_urls) == len(urls_to_process)
+
+        # Same images re-uploaded under different URLs hit the content-hash entry
+        content_key = self._cache_key(caption, [data_url.encode() for data_url in data_urls])
+        cached = self._load_cached(content_key)
+        if cached is not None:
+            logger.info("Using cached visual analysis for identical image content")
+            if complete:
+                self._store_cached(url_key, cached)
+            return cached, complete
+
+        num_slides = len(data_urls)
+        if self.stitch_slides and num_slides > 1:
+            slides = [base64.b64decode(data_url[len(DATA_URL_PREFIX):]) for data_url in data_urls]
+            try:
+                data_urls = [self._to_data_url(self._stitch_slides(slides))]
+            except (UnidentifiedImageError, OSError) as e:
+                logger.warning("Could not stitch slides, sending them individually: %s", e)
 
         logger.info(
             "Downloaded %d/%d images, sending to GPT-4o",
-            len(images_base64),
+            num_slides,
             len(urls_to_process),
         )
 
         # Analyze with GPT-4o
-        result = self._analyze_with_gpt4o(images_base64, caption)
-        return result
+        result = self._analyze_with_gpt4o(data_urls, caption, num_slides)
+        if result["slides"]:
+            # The content key hashes exactly the slides sent; the URL key is
+            # only safe when every URL made it, or a transient download
+            # failure would pin a partial analysis for the whole TTL
+            if complete:
+                self._store_cached(url_key, result)
+            self._store_cached(content_key, result)
+        return result, complete
+
+    def _cache_key(self, caption: str, parts: list) -> str:
+        """Hash a caption plus image URLs or image bytes into a cache key."""
+        digest = hashlib.sha256(caption.encode())
+        for part in parts:
+            digest.update(b"|")
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+
+    def _encoded_path(self, url: str) -> Path:
+        """Location of an image's encoded data URL in the image cache."""
+        return self.cache_dir / "images" / (hashlib.sha256(url.encode()).hexdigest() + ".b64")
+
+    def _load_encoded(self, url: str) -> Optional[str]:
+        """Return the data URL stored for an image on an earlier attempt, else None."""
+        if not self.cache_dir:
+            return None
+        path = self._encoded_path(url)
+        try:
+            data_url = path.read_text()
+            os.utime(path)  # mark as recently used for eviction
+            return data_url
+        except OSError:
+            return None
+
+    def _store_encoded(self, url: str, data_url: str):
+        """Persist an image's data URL so retries skip download and encoding."""
+        if not self.cache_dir:
+            return
+        path = self._encoded_path(url)
+        if self._encoded_bytes is None:
+            self._encoded_bytes = self._scan_encoded()[1]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(data_url)
+            os.replace(tmp_path, path)
+            self._encoded_bytes += len(data_url) - replaced
+        except OSError as e:
+            logger.warning("Could not cache encoded image: %s", e)
+
+    def _scan_encoded(self) -> tuple:
+        """List the image cache on disk: ([(path, stat), ...], total bytes)."""
+        try:
+            entries = [(p, p.stat()) for p in (self.cache_dir / "images").glob("*.b64")]
+        except OSError:
+            return [], 0
+        return entries, sum(st.st_size for _, st in entries)
 
-    def _download_image(self, url: str) -> Optional[bytes]:
+    def _evict_encoded(self):
+        """Trim the image cache to IMAGE_CACHE_MAX_BYTES, least recently used first.
+
+        The directory is only scanned when the running total says the cap is
+        exceeded; it is then trimmed to IMAGE_CACHE_LOW_WATER of the cap.
+        """
+        if not self.cache_dir or self._encoded_bytes is None:
+            return
+        if self._encoded_bytes <= IMAGE_CACHE_MAX_BYTES:
+            return
+        entries, total = self._scan_encoded()
+        target = IMAGE_CACHE_MAX_BYTES * IMAGE_CACHE_LOW_WATER
+        for path, st in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= st.st_size
+            except OSError:
+                pass
+        self._encoded_bytes = total
+
+    def _load_cached(self, key: str) -> Optional[dict]:
+        """Return a cached analysis that is younger than VISUAL_CACHE_TTL, else None."""
+        if not self.cache_dir:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > VISUAL_CACHE_TTL:
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, key: str, result: dict):
+        """Write an analysis to the cache (atomic rename)."""
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+            tmp_path.write_text(json.dumps(result))
+            os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        except OSError as e:
+            logger.warning("Could not cache visual analysis: %s", e)
+
+    def _download_image(self, url: str) -> Optional[bytearray]:
         """Download image bytes from URL.
 
         Args:
             url: Image URL to download.
 
         Returns:
-            Raw image bytes, or None on failure.
+            Raw image bytes, in the buffer they were streamed into, or None on failure.
         """
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.content
+            with self._session.get(url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                buf = bytearray()
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    buf.extend(chunk)
+            return buf
         except Exception as e:
             logger.error("Image download failed for %s: %s", url, e)
             return None
 
-    def _analyze_with_gpt4o(self, images_base64: list, caption: str) -> dict:
+    def _prepare_image(self, img_data):
+        """Downscale and re-encode an image as JPEG before upload.
+
+        JPEGs already within MAX_IMAGE_SIDE are passed through untouched, so
+        small images are never re-encoded.
+
+        Args:
+            img_data: Raw downloaded image bytes (bytes or bytearray).
+
+        Returns:
+            JPEG data no larger than MAX_IMAGE_SIDE on either side; img_data
+            itself when passed through.
+        """
+        try:
+            with _BufferReader(img_data) as fp, Image.open(fp) as img:
+                if img.format == "JPEG" and max(img.size) <= MAX_IMAGE_SIDE:
+                    return img_data
+                img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+                buf = io.BytesIO()
+                img.convert("RGB").save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+                return buf.getvalue()
+        except Exception as e:
+            logger.warning("Could not re-encode image, sending original: %s", e)
+            return img_data
+
+    def _stitch_slides(self, images: list) -> bytes:
+        """Lay slides out left-to-right, top-to-bottom in one JPEG grid.
+
+        Slides are separated by GRID_GAP white pixels and scaled to a common
+        width so the whole grid fits within MAX_GRID_SIDE.
+
+        Args:
+            images: Slide image bytes, in slide order.
+
+        Returns:
+            JPEG bytes of the stitched grid.
+        """
+        slides = [Image.open(io.BytesIO(img)).convert("RGB") for img in images]
+        cols = math.ceil(math.sqrt(len(slides)))
+        rows = math.ceil(len(slides) / cols)
+
+        cell_w = min(max(s.width for s in slides), (MAX_GRID_SIDE - GRID_GAP * (cols - 1)) // cols)
+        scaled = [s.resize((cell_w, max(1, round(s.height * cell_w / s.width)))) for s in slides]
+        row_heights = [
+            max(s.height for s in scaled[r * cols:(r + 1) * cols]) for r in range(rows)
+        ]
+
+        grid = Image.new(
+            "RGB",
+            (cols * cell_w + GRID_GAP * (cols - 1), sum(row_heights) + GRID_GAP * (rows - 1)),
+            "white",
+        )
+        y = 0
+        for r, row_height in enumerate(row_heights):
+            for c, slide in enumerate(scaled[r * cols:(r + 1) * cols]):
+                grid.paste(slide, (c * (cell_w + GRID_GAP), y))
+            y += row_height + GRID_GAP
+
+        grid.thumbnail((MAX_GRID_SIDE, MAX_GRID_SIDE), Image.LANCZOS)
+        buf = io.BytesIO()
+        grid.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return buf.getvalue()
+
+    def _to_data_url(self, img_data) -> str:
+        """Encode image bytes as a base64 JPEG data URL in a single pass.
+
+        Args:
+            img_data: Raw image bytes (any bytes-like object, read in place).
+
+        Returns:
+            ``data:image/jpeg;base64,...`` URL string.
+        """
+        return (DATA_URL_PREFIX + base64.b64encode(img_data)).decode("ascii")
+
+    def _analyze_with_gpt4o(
+        self, data_urls: list, caption: str, num_slides: Optional[int] = None
+    ) -> dict:
         """Send images to GPT-4o for analysis.
 
         Args:
-            images_base64: List of base64-encoded image strings.
+            data_urls: List of base64 ``data:`` image URLs.
             caption: The post caption text.
+            num_slides: Slides represented by data_urls, when they were stitched
+                into a single grid image. Defaults to one slide per URL.
 
         Returns:
             Analysis dict matching VisualAnalysisResult schema.
         """
-        prompt_text = self._build_analysis_prompt(caption, len(images_base64))
+        num_slides = num_slides or len(data_urls)
+        stitched = len(data_urls) == 1 and num_slides > 1
+        prompt_text = self._build_analysis_prompt(caption, num_slides, stitched)
 
         # Build content array: prompt text + all images
         content = [{"type": "text", "text": prompt_text}]
-        for img_b64 in images_base64:
+        for data_url in data_urls:
             content.append(
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"},
+                    "image_url": {"url": data_url},
                 }
             )
 
@@ -137,160 +627,67 @@ class VisualAnalyzer:
                 max_tokens=4000,
             )
             raw = response.choices[0].message.content
-            result = json.loads(raw)
-            logger.info("GPT-4o analysis complete, post_type=%s", result.get("post_type"))
-            return self._normalize_result(result)
-        except json.JSONDecodeError as e:
+            result = self._normalize_result(raw)
+            logger.info("GPT-4o analysis complete, post_type=%s", result["post_type"])
+            return result
+        except ValidationError as e:
             logger.error("Failed to parse GPT-4o JSON response: %s", e)
             return self._empty_result()
         except Exception as e:
             logger.error("GPT-4o analysis failed: %s", e)
             return self._empty_result()
 
-    def _build_analysis_prompt(self, caption: str, num_images: int) -> str:
+    def _build_analysis_prompt(self, caption: str, num_images: int, stitched: bool = False) -> str:
         """Build the GPT-4o prompt for format-focused visual analysis.
 
         Args:
             caption: The post caption text.
             num_images: Number of images being analyzed.
+            stitched: Whether the slides arrive as one stitched grid image.
 
         Returns:
             The full prompt string.
         """
-        return f"""Analyze these {num_images} image(s) from a social media post and return a JSON object with the following structure.
-
-POST CAPTION (for context):
-\"\"\"{caption}\"\"\"
-
-INSTRUCTIONS:
-1. Extract ALL text overlays exactly as written (verbatim) from each slide.
-2. Describe what each image actually shows (subjects, actions, setting).
-3. Classify the post type based on the balance of text vs visuals.
-4. Identify the visual style (colors, fonts, layout patterns).
-5. For visual-first posts: describe the visual narrative/progression across slides.
-
-POST TYPE CLASSIFICATION CRITERIA:
-- "text_heavy": Text IS the content, images are backgrounds/decoration. Most slides have text overlays.
-- "hybrid": Text and visuals work together. Some slides have text, visuals support/illustrate.
-- "visual_first": Visuals ARE the content. Little or no text on slides.
-- "photo_dump": Curated photo collection. No text on slides, photos tell the story.
-- "meme_quote": Single text block per slide on aesthetic background. Quote or meme format.
-- "infographic": Data, charts, or diagrams. Information design focused.
-
-REQUIRED JSON OUTPUT:
-{{
-    "post_type": "text_heavy|hybrid|visual_first|photo_dump|meme_quote|infographic",
-    "text_density": "high|medium|low|none",
-    "slide_count": {num_images},
-    "slides": [
-        {{
-            "slide_number": 1,
-            "text_overlays": ["exact text on this slide"],
-            "visual_description": "what the image actually shows",
-            "subjects": ["people", "objects", "scenes depicted"],
-            "mood": "emotional tone",
-            "layout": "how elements are arranged (e.g. centered_text_over_photo, text_on_solid_bg, full_photo, split_layout)",
-            "dominant_colors": ["#hex1", "#hex2"],
-            "font_style": "bold_sans_serif|handwritten|serif|null if no text",
-            "text_position": "center|top|bottom|left|right|null if no text",
-            "text_styling": {{
-                "headline_size": "large|medium|small|null if no headline",
-                "body_size": "large|medium|small|null if no body text",
-                "text_color": "#hex color of main text",
-                "headline_color": "#hex color of headline if different from body, else null",
-                "text_weight": "bold|regular|light|mixed",
-                "text_case": "uppercase|lowercase|title_case|sentence_case|mixed",
-                "text_effects": ["shadow", "outline", "glow", "none"],
-                "background_treatment": "semi_transparent_overlay|solid_color_block|gradient|none|blurred_photo",
-                "text_to_image_ratio": 0.5,
-                "text_hierarchy": "describe how text sizes/weights create visual hierarchy (e.g. 'large bold header, smaller regular body below')"
-            }}
-        }}
-    ],
-    "overall_visual_style": {{
-        "aesthetic": "free-form description of the visual aesthetic",
-        "color_palette": ["#hex1", "#hex2", "#hex3"],
-        "consistency": "how slides relate visually to each other",
-        "visual_narrative": "for visual-first posts: how the image sequence tells a story",
-        "brand_elements": "logos, watermarks, recurring visual motifs"
-    }}
-}}
-
-Return one slide object per image, numbered sequentially. Be precise with text overlays and hex color codes."""
+        layout_note = ""
+        if stitched:
+            layout_note = (
+                f"\nThe {num_images} slides are concatenated into a single grid image with "
+                f"{GRID_GAP} px white spacing between them. Slide order is left-to-right, "
+                "then top-to-bottom.\n"
+            )
+        return ANALYSIS_PROMPT.format(
+            num_images=num_images, caption=caption, layout_note=layout_note
+        )
 
-    def _normalize_result(self, result: dict) -> dict:
-        """Normalize GPT-4o output to match VisualAnalysisResult schema.
+    def _normalize_result(self, raw: str) -> dict:
+        """Decode GPT-4o output and normalize it to the VisualAnalysisResult schema.
 
         Ensures all expected fields are present with correct defaults.
 
         Args:
-            result: Raw parsed JSON from GPT-4o.
+            raw: Raw JSON text from GPT-4o.
 
         Returns:
             Normalized dict matching the schema.
+
+        Raises:
+            ValidationError: If the response is not a JSON object.
         """
-        valid_post_types = {
-            "text_heavy",
-            "hybrid",
-            "visual_first",
-            "photo_dump",
-            "meme_quote",
-            "infographic",
-        }
+        result = RawVisualAnalysis.model_validate_json(raw)
 
-        post_type = result.get("post_type", "visual_first")
-        if post_type not in valid_post_types:
-            logger.warning("Unknown post_type '%s', defaulting to 'visual_first'", post_type)
-            post_type = "visual_first"
-
-        # Normalize slides
-        slides = []
-        for s in result.get("slides", []):
-            ts = s.get("text_styling") or {}
-            text_styling = {
-                "headline_size": ts.get("headline_size"),
-                "body_size": ts.get("body_size"),
-                "text_color": ts.get("text_color"),
-                "headline_color": ts.get("headline_color"),
-                "text_weight": ts.get("text_weight"),
-                "text_case": ts.get("text_case"),
-                "text_effects": ts.get("text_effects", ["none"]),
-                "background_treatment": ts.get("background_treatment", "none"),
-                "text_to_image_ratio": ts.get("text_to_image_ratio", 0.0),
-                "text_hierarchy": ts.get("text_hierarchy", ""),
-            }
-            slides.append(
-                {
-                    "slide_number": s.get("slide_number", len(slides) + 1),
-                    "text_overlays": s.get("text_overlays", []),
-                    "visual_description": s.get("visual_description", ""),
-                    "subjects": s.get("subjects", []),
-                    "mood": s.get("mood", ""),
-                    "layout": s.get("layout", ""),
-                    "dominant_colors": s.get("dominant_colors", []),
-                    "font_style": s.get("font_style"),
-                    "text_position": s.get("text_position"),
-                    "text_styling": text_styling,
-                }
+        if result.post_type not in VALID_POST_TYPES:
+            logger.warning(
+                "Unknown post_type '%s', defaulting to 'visual_first'", result.post_type
             )
+            result.post_type = "visual_first"
 
-        # Normalize overall_visual_style
-        ovs = result.get("overall_visual_style", {})
-        overall_visual_style = {
-            "aesthetic": ovs.get("aesthetic", ""),
-            "color_palette": ovs.get("color_palette", []),
-            "consistency": ovs.get("consistency", ""),
-            "visual_narrative": ovs.get("visual_narrative", ""),
-            "brand_elements": ovs.get("brand_elements", ""),
-        }
+        for i, slide in enumerate(result.slides):
+            if slide.slide_number is None:
+                slide.slide_number = i + 1
+        if result.slide_count is None:
+            result.slide_count = len(result.slides)
 
-        return {
-            "post_type": post_type,
-            "text_density": result.get("text_density", "none"),
-            "slide_count": result.get("slide_count", len(slides)),
-            "slides": slides,
-            "overall_visual_style": overall_visual_style,
-        }
+        return result.model_dump()
 
     def _empty_result(self) -> dict:
         """Return an empty result matching the VisualAnalysisResult schema."""
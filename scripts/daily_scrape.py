@@ -1,7 +1,10 @@
 """Daily cron job: scrape metrics for all accounts."""
 import importlib.util
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -16,32 +19,33 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 ACCOUNTS_DIR = PROJECT_ROOT / "accounts"
+MAX_WORKERS = 4
+# Workers write to the same DB file and SQLite allows one writer at a time
+# (WAL only lets reads overlap a write). Wait out another worker's upsert
+# batch rather than dropping an account's scrape after sqlite3's default 5s.
+DB_TIMEOUT = 30.0
 
 
-def main():
-    db = AnalyticsDB(DATA_DIR / "analytics.db")
-    scraper = AccountScraper(db=db)
+@lru_cache(maxsize=None)
+def _load_account_config(config_path: Path):
+    """Execute an account's config.py once and return the module."""
+    spec = importlib.util.spec_from_file_location(f"{config_path.parent.name}_config", config_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-    profiles = {}
-    for account_dir in ACCOUNTS_DIR.iterdir():
-        if not account_dir.is_dir():
-            continue
-        config_path = account_dir / "config.py"
-        if not config_path.exists():
-            continue
-        spec = importlib.util.spec_from_file_location(f"{account_dir.name}_config", config_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        if hasattr(module, "PLATFORM_PROFILES"):
-            profiles[account_dir.name] = module.PLATFORM_PROFILES
 
-    if not profiles:
-        logger.warning("No accounts with PLATFORM_PROFILES configured")
-        return
+def process_account(account: str, platforms: dict[str, str]):
+    """Scrape one account's platforms, then backfill its unmatched posts.
 
-    results = scraper.scrape_all(profiles)
-    for account, platforms in results.items():
-        for platform, result in platforms.items():
+    Runs on a worker thread, so it opens its own AnalyticsDB connection and
+    Apify client instead of sharing the main thread's.
+    """
+    db = AnalyticsDB(DATA_DIR / "analytics.db", timeout=DB_TIMEOUT)
+    try:
+        scraper = AccountScraper(db=db)
+        results = scraper.scrape_all({account: platforms})[account]
+        for platform, result in results.items():
             if "error" in result:
                 logger.error(f"{account}/{platform}: {result['error']}")
             else:
@@ -53,9 +57,7 @@ def main():
             # Check output_config from the module
             config_path = ACCOUNTS_DIR / account / "config.py"
             if config_path.exists():
-                spec = importlib.util.spec_from_file_location(f"{account}_config", config_path)
-                mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(mod)
+                mod = _load_account_config(config_path)
                 output_base_str = getattr(mod, "OUTPUT_CONFIG", {}).get("base_directory")
                 if output_base_str:
                     account_output = Path(output_base_str)
@@ -65,8 +67,41 @@ def main():
             matched = matcher.backfill_account(account)
             if matched:
                 logger.info(f"Backfilled {matched} posts for {account}")
+    finally:
+        db.close()
+
+
+def main():
+    profiles = {}
+    with os.scandir(ACCOUNTS_DIR) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            config_path = Path(entry.path) / "config.py"
+            if not config_path.exists():
+                continue
+            module = _load_account_config(config_path)
+            if hasattr(module, "PLATFORM_PROFILES"):
+                profiles[entry.name] = module.PLATFORM_PROFILES
+
+    if not profiles:
+        logger.warning("No accounts with PLATFORM_PROFILES configured")
+        return
+
+    # Create the schema once up front so workers don't race on it
+    AnalyticsDB(DATA_DIR / "analytics.db").close()
 
-    db.close()
+    # Accounts are independent, so one account's backfill overlaps the next one's scrape
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(process_account, account, platforms): account
+            for account, platforms in profiles.items()
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Daily scrape failed for {futures[future]}: {e}")
 
 
 if __name__ == "__main__":
@@ -4,6 +4,9 @@ Migration Script: Dreamtime Lullabies → Framework
 Migrate existing dreamtimelullabies account to new framework structure
 """
 
+import ctypes
+import ctypes.util
+import os
 import shutil
 import json
 from pathlib import Path
@@ -15,6 +18,33 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config_schema import AccountConfig
 
 
+def _load_clonefile():
+    """clonefile(2) from libc on macOS (APFS copy-on-write), else None"""
+    if sys.platform != "darwin":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        clonefile = libc.clonefile
+    except (OSError, AttributeError):
+        return None
+    clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+
+_clonefile = _load_clonefile()
+
+
+def _clone_or_copy(src, dst):
+    """Copy-on-write clone where the OS supports it, regular copy otherwise"""
+    # clonefile fails (e.g. EEXIST, EXDEV, non-APFS volume) rather than
+    # overwriting, so any error falls through to a normal copy
+    if _clonefile is not None and not os.path.isdir(dst):
+        if _clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+            return dst
+    return shutil.copy2(src, dst)
+
+
 def migrate_dreamtime():
     """Migrate dreamtimelullabies to new framework"""
 
@@ -65,15 +95,18 @@ def migrate_dreamtime():
     target_output = target_dir / "output"
 
     if source_output.exists():
-        # Count files for progress
-        file_count = sum(1 for _ in source_output.rglob("*") if _.is_file())
-        print(f"   Found {file_count} files to migrate...")
-
         if target_output.exists():
             print("   ⚠️  Target output directory already exists, skipping...")
         else:
-            shutil.copytree(source_output, target_output)
-            print(f"   ✓ Migrated output directory ({file_count} files)")
+            # Count files as they are copied instead of walking the tree twice
+            copied = []
+
+            def copy_and_count(src, dst):
+                copied.append(src)
+                return _clone_or_copy(src, dst)
+
+            shutil.copytree(source_output, target_output, copy_function=copy_and_count)
+            print(f"   ✓ Migrated output directory ({len(copied)} files)")
     else:
         print("   ⚠️  No output directory found")
         target_output.mkdir(parents=True, exist_ok=True)
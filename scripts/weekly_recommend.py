@@ -1,6 +1,8 @@
 """Weekly cron job: generate recommendations for all accounts."""
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -14,21 +16,47 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 ACCOUNTS_DIR = PROJECT_ROOT / "accounts"
+MAX_WORKERS = 8
+# Workers write to the same DB file and SQLite allows one writer at a time
+# (WAL only lets reads overlap a write). Wait longer than sqlite3's default 5s
+# for another worker's write before giving up with "database is locked".
+DB_TIMEOUT = 30.0
+
+
+def generate_for_account(name: str) -> list[dict]:
+    """Generate recommendations for one account on its own DB connection.
+
+    sqlite3 connections can't be shared across threads, so each worker opens
+    (and closes) its own AnalyticsDB.
+    """
+    db = AnalyticsDB(DATA_DIR / "analytics.db", timeout=DB_TIMEOUT)
+    try:
+        return Recommender(db=db).generate_recommendations(name)
+    finally:
+        db.close()
 
 
 def main():
-    db = AnalyticsDB(DATA_DIR / "analytics.db")
-    recommender = Recommender(db=db)
-
-    for account_dir in ACCOUNTS_DIR.iterdir():
-        if not account_dir.is_dir():
-            continue
-        name = account_dir.name
-        logger.info(f"Generating recommendations for {name}")
-        recs = recommender.generate_recommendations(name)
-        logger.info(f"Generated {len(recs)} recommendations for {name}")
-
-    db.close()
+    # Create the schema once up front so workers don't race on it
+    AnalyticsDB(DATA_DIR / "analytics.db").close()
+
+    with os.scandir(ACCOUNTS_DIR) as entries:
+        names = [entry.name for entry in entries if entry.is_dir()]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {}
+        for name in names:
+            logger.info(f"Generating recommendations for {name}")
+            futures[executor.submit(generate_for_account, name)] = name
+
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                recs = future.result()
+            except Exception as e:
+                logger.error(f"Recommendation generation failed for {name}: {e}")
+                continue
+            logger.info(f"Generated {len(recs)} recommendations for {name}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+import shutil
+from datetime import date, timedelta
+
+import pytest
+from core.analytics.analyzer import AccountAnalyzer
+from core.analytics.db import AnalyticsDB
+
+
+# One publish date per day from 2026-02-01, precomputed for up to a year of
+# posts per format (step guides at 10:00, habit lists at 14:00)
+_DAYS = [date(2026, 2, 1) + timedelta(days=i) for i in range(365)]
+_SG_DATES = [f"{day}T10:00:00" for day in _DAYS]
+_HL_DATES = [f"{day}T14:00:00" for day in _DAYS]
+
+
+@pytest.fixture(scope="session")
+def schema_template(tmp_path_factory):
+    """An empty analytics DB file with the schema applied, built once per session."""
+    path = tmp_path_factory.mktemp("schema") / "template.db"
+    AnalyticsDB(path).close()
+    return path
+
+
+@pytest.fixture
+def fresh_db_path(schema_template, tmp_path):
+    """Path to a private copy of the schema template, for on-disk test DBs.
+
+    AnalyticsDB sees the schema is already current and skips the DDL.
+    """
+    path = tmp_path / "test.db"
+    shutil.copyfile(schema_template, path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def make_db():
+    """Factory for analytics DBs with n_sg step_guide and n_hl habit_list posts.
+
+    Each size is built once per test module and shared, so callers must not
+    mutate the returned DB (see ``db_for_visuals`` for the exception).
+    """
+    built = {}
+
+    def _make(n_sg: int = 5, n_hl: int = 5) -> AnalyticsDB:
+        if (n_sg, n_hl) in built:
+            return built[(n_sg, n_hl)]
+        assert max(n_sg, n_hl) <= len(_DAYS), "extend _DAYS for larger fixtures"
+        db = AnalyticsDB(":memory:")
+        # Insert posts across 2 formats, one snapshot each
+        db.bulk_upsert_posts([
+            dict(account_name="test", platform="tiktok", post_id=f"sg_{i}",
+                 format="step_guide", hook_score=16.0, slide_count=5,
+                 content_pillar="sleep_routines", published_at=published_at)
+            for i, published_at in enumerate(_SG_DATES[:n_sg])
+        ] + [
+            dict(account_name="test", platform="tiktok", post_id=f"hl_{i}",
+                 format="habit_list", hook_score=14.0, slide_count=7,
+                 content_pillar="tantrum_management", published_at=published_at)
+            for i, published_at in enumerate(_HL_DATES[:n_hl])
+        ])
+        db.bulk_insert_snapshots([
+            dict(post_id=f"sg_{i}", views=10000, likes=500, comments=50, shares=30, saves=200)
+            for i in range(n_sg)
+        ] + [
+            dict(post_id=f"hl_{i}", views=4000, likes=100, comments=10, shares=5, saves=30)
+            for i in range(n_hl)
+        ])
+        built[(n_sg, n_hl)] = db
+        return db
+
+    yield _make
+    for db in built.values():
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def db_with_data(make_db):
+    """Shared analytics DB: 5 step_guide + 5 habit_list posts."""
+    return make_db()
+
+
+@pytest.fixture(scope="module")
+def analyzer(db_with_data):
+    """AccountAnalyzer over the shared DB; it keeps no per-account state."""
+    return AccountAnalyzer(db=db_with_data)
+
+
+@pytest.fixture(scope="module")
+def full_report(analyzer):
+    """full_report("test") computed once; tests assert on its sections."""
+    return analyzer.full_report("test")
+
+
+@pytest.fixture
+def db_for_visuals(db_with_data):
+    """The shared DB for tests that add post_visuals rows; wiped again on teardown."""
+    yield db_with_data
+    db_with_data.execute("DELETE FROM post_visuals")
+    db_with_data.conn.commit()
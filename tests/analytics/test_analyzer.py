@@ -1,63 +1,66 @@
 import json
 import pytest
-from core.analytics.db import AnalyticsDB
 from core.analytics.analyzer import AccountAnalyzer
 
-
-@pytest.fixture
-def db_with_data(tmp_path):
-    db = AnalyticsDB(tmp_path / "test.db")
-    # Insert posts across 2 formats
-    for i in range(5):
-        db.upsert_post(account_name="test", platform="tiktok", post_id=f"sg_{i}",
-                        format="step_guide", hook_score=16.0, slide_count=5,
-                        content_pillar="sleep_routines", published_at=f"2026-02-0{i+1}T10:00:00")
-        db.insert_snapshot(post_id=f"sg_{i}", views=10000, likes=500, comments=50, shares=30, saves=200)
-
-    for i in range(5):
-        db.upsert_post(account_name="test", platform="tiktok", post_id=f"hl_{i}",
-                        format="habit_list", hook_score=14.0, slide_count=7,
-                        content_pillar="tantrum_management", published_at=f"2026-02-0{i+1}T14:00:00")
-        db.insert_snapshot(post_id=f"hl_{i}", views=4000, likes=100, comments=10, shares=5, saves=30)
-    return db
+OUTDOOR_DOMINANT = {"photography_style": "iphone_authentic", "lighting": "golden_hour",
+                    "composition": "wide", "scene_setting": "outdoor",
+                    "subject_focus": "child_solo", "mood": "energetic"}
+OUTDOOR_HOOK = {"composition": "wide", "photography_style": "iphone_authentic",
+                "lighting": "golden_hour", "mood": "energetic",
+                "subject_focus": "child_solo"}
+CINEMATIC_DOMINANT = {"photography_style": "cinematic", "lighting": "moody",
+                      "composition": "closeup", "scene_setting": "bedroom",
+                      "subject_focus": "hands_detail", "mood": "warm_cozy"}
+CINEMATIC_HOOK = {"composition": "closeup", "photography_style": "cinematic",
+                  "lighting": "moody", "mood": "warm_cozy",
+                  "subject_focus": "hands_detail"}
 
 
 class TestAccountAnalyzer:
-    def test_format_performance(self, db_with_data):
-        analyzer = AccountAnalyzer(db=db_with_data)
-        result = analyzer.analyze_formats("test")
+    def test_format_performance(self, full_report):
+        result = full_report["formats"]
         assert "step_guide" in result
         assert "habit_list" in result
         assert result["step_guide"]["avg_views"] > result["habit_list"]["avg_views"]
 
-    def test_pillar_performance(self, db_with_data):
-        analyzer = AccountAnalyzer(db=db_with_data)
-        result = analyzer.analyze_pillars("test")
+    def test_pillar_performance(self, full_report):
+        result = full_report["pillars"]
         # Pillars are now grouped into broad categories
         assert "Sleep & Routines" in result
         assert "Behavior & Discipline" in result
         assert result["Sleep & Routines"]["post_count"] == 5
         assert result["Behavior & Discipline"]["post_count"] == 5
 
-    def test_top_and_bottom_posts(self, db_with_data):
-        analyzer = AccountAnalyzer(db=db_with_data)
-        top = analyzer.top_posts("test", n=3)
-        bottom = analyzer.bottom_posts("test", n=3)
-        assert len(top) == 3
-        assert len(bottom) == 3
+    def test_classify_pillar(self):
+        assert AccountAnalyzer._classify_pillar("sleep_routines") == "Sleep & Routines"
+        assert AccountAnalyzer._classify_pillar("DIY Cardboard Crafts") == "Activities & Play"
+        assert AccountAnalyzer._classify_pillar("cooking pasta") == "Other"
+
+    def test_top_and_bottom_posts(self, analyzer, full_report):
+        assert len(analyzer.top_posts("test", n=3)) == 3
+        assert len(analyzer.bottom_posts("test", n=3)) == 3
+        top = full_report["top_posts"]
+        bottom = full_report["bottom_posts"]
+        assert len(top) == 5
+        assert len(bottom) == 5
         assert top[0]["views"] >= top[1]["views"]
         assert bottom[0]["views"] <= bottom[1]["views"]
 
-    def test_pareto_analysis(self, db_with_data):
-        analyzer = AccountAnalyzer(db=db_with_data)
-        result = analyzer.pareto_analysis("test")
+    def test_format_performance_scales(self, make_db):
+        analyzer = AccountAnalyzer(db=make_db(n_sg=50, n_hl=20))
+        result = analyzer.analyze_formats("test")
+        assert result["step_guide"]["post_count"] == 50
+        assert result["habit_list"]["post_count"] == 20
+        assert analyzer.posting_cadence("test")["total_posts"] == 70
+
+    def test_pareto_analysis(self, full_report):
+        result = full_report["pareto"]
         assert "top_formats" in result
         assert "top_pillars" in result
         assert result["top_formats"][0]["format"] == "step_guide"
 
-    def test_full_report(self, db_with_data):
-        analyzer = AccountAnalyzer(db=db_with_data)
-        report = analyzer.full_report("test")
+    def test_full_report(self, full_report):
+        report = full_report
         assert "formats" in report
         assert "pillars" in report
         assert "top_posts" in report
@@ -76,16 +79,33 @@ class TestAccountAnalyzer:
         # Cadence should have posts_per_week
         assert report["cadence"]["posts_per_week"] is not None
 
-    def test_visual_analysis_empty(self, db_with_data):
+    def test_aggregations_need_no_temp_sort(self, analyzer, db_with_data):
+        """Grouping queries are served by indexes, with no sort for a discarded order."""
+        statements = []
+        db_with_data.conn.set_trace_callback(statements.append)
+        try:
+            analyzer.analyze_formats("test")
+            analyzer.analyze_pillars("test")
+            analyzer.pareto_analysis("test")
+            analyzer.analyze_visuals("test")
+        finally:
+            db_with_data.conn.set_trace_callback(None)
+
+        assert statements
+        for sql in statements:
+            plan = db_with_data.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            details = [row["detail"] for row in plan]
+            assert not any("TEMP B-TREE" in d for d in details), (sql, details)
+
+    def test_visual_analysis_empty(self, analyzer):
         """Visual analysis returns empty dict when no visual data exists."""
-        analyzer = AccountAnalyzer(db=db_with_data)
         result = analyzer.analyze_visuals("test")
         assert result == {}
 
-    def test_visual_analysis_with_data(self, db_with_data):
+    def test_visual_analysis_with_data(self, analyzer, db_for_visuals):
         """Visual analysis returns attribute breakdowns when visual data exists."""
         # Add visual data for some posts
-        db_with_data.upsert_post_visuals(
+        db_for_visuals.upsert_post_visuals(
             post_id="sg_0",
             dominant={"photography_style": "iphone_authentic", "lighting": "golden_hour",
                       "composition": "closeup", "scene_setting": "bedroom", "mood": "warm_cozy"},
@@ -93,7 +113,7 @@ class TestAccountAnalyzer:
                   "lighting": "golden_hour", "mood": "warm_cozy"},
             all_attributes={},
         )
-        db_with_data.upsert_post_visuals(
+        db_for_visuals.upsert_post_visuals(
             post_id="sg_1",
             dominant={"photography_style": "iphone_authentic", "lighting": "natural",
                       "composition": "wide", "scene_setting": "outdoor", "mood": "energetic"},
@@ -101,58 +121,38 @@ class TestAccountAnalyzer:
                   "lighting": "natural", "mood": "energetic"},
             all_attributes={},
         )
-        analyzer = AccountAnalyzer(db=db_with_data)
         result = analyzer.analyze_visuals("test")
         assert "photography_style" in result
         assert "iphone_authentic" in result["photography_style"]
         assert result["photography_style"]["iphone_authentic"]["post_count"] == 2
 
-    def test_hook_visual_analysis(self, db_with_data):
+    def test_hook_visual_analysis(self, analyzer, db_for_visuals):
         """Hook visual analysis returns hook-specific attribute breakdowns."""
-        db_with_data.upsert_post_visuals(
+        db_for_visuals.upsert_post_visuals(
             post_id="sg_0",
             dominant={"photography_style": "iphone_authentic"},
             hook={"composition": "closeup", "photography_style": "iphone_authentic",
                   "lighting": "golden_hour", "mood": "warm_cozy"},
             all_attributes={},
         )
-        analyzer = AccountAnalyzer(db=db_with_data)
         result = analyzer.analyze_hook_visuals("test")
         assert "composition" in result
         assert "closeup" in result["composition"]
 
-    def test_refresh_context_writes_visual_insights(self, db_with_data, tmp_path):
+    def test_refresh_context_writes_visual_insights(self, analyzer, db_for_visuals, tmp_path):
         """refresh_context writes visual_insights and explore_targets to file."""
-        # Add visual data for multiple posts so we hit the min 2 threshold
-        for post_id in ["sg_0", "sg_1", "sg_2"]:
-            db_with_data.upsert_post_visuals(
-                post_id=post_id,
-                dominant={"photography_style": "iphone_authentic", "lighting": "golden_hour",
-                          "composition": "wide", "scene_setting": "outdoor",
-                          "subject_focus": "child_solo", "mood": "energetic"},
-                hook={"composition": "wide", "photography_style": "iphone_authentic",
-                      "lighting": "golden_hour", "mood": "energetic",
-                      "subject_focus": "child_solo"},
-                all_attributes={},
-            )
-
-        # One post with a different style (will be <2 so goes to explore_targets)
-        db_with_data.upsert_post_visuals(
-            post_id="sg_3",
-            dominant={"photography_style": "cinematic", "lighting": "moody",
-                      "composition": "closeup", "scene_setting": "bedroom",
-                      "subject_focus": "hands_detail", "mood": "warm_cozy"},
-            hook={"composition": "closeup", "photography_style": "cinematic",
-                  "lighting": "moody", "mood": "warm_cozy",
-                  "subject_focus": "hands_detail"},
-            all_attributes={},
+        # Three posts share a style so they hit the min 2 threshold; the
+        # cinematic one stays <2 and goes to explore_targets
+        db_for_visuals.bulk_upsert_post_visuals(
+            [{"post_id": post_id, "dominant": OUTDOOR_DOMINANT, "hook": OUTDOOR_HOOK}
+             for post_id in ["sg_0", "sg_1", "sg_2"]]
+            + [{"post_id": "sg_3", "dominant": CINEMATIC_DOMINANT, "hook": CINEMATIC_HOOK}]
         )
 
         context_path = tmp_path / "performance_context.json"
         # Pre-populate with existing data to verify merge
         context_path.write_text(json.dumps({"format_weights": {"habit_list": 1.5}, "sample_size": 10}))
 
-        analyzer = AccountAnalyzer(db=db_with_data)
         result = analyzer.refresh_context("test", context_path)
 
         # Verify return value
@@ -168,11 +168,12 @@ class TestAccountAnalyzer:
         assert "last_updated" in written
         # Existing data preserved
         assert written["format_weights"] == {"habit_list": 1.5}
+        # Written via a temp file that is renamed into place
+        assert not list(tmp_path.glob("*.tmp"))
 
-    def test_refresh_context_empty_visuals(self, db_with_data, tmp_path):
+    def test_refresh_context_empty_visuals(self, analyzer, tmp_path):
         """refresh_context handles accounts with no visual data gracefully."""
         context_path = tmp_path / "performance_context.json"
-        analyzer = AccountAnalyzer(db=db_with_data)
         result = analyzer.refresh_context("test", context_path)
 
         assert result["top_performing"] == {}
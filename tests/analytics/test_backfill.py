@@ -6,13 +6,17 @@ from core.analytics.db import AnalyticsDB
 
 
 @pytest.fixture
-def db(tmp_path):
-    return AnalyticsDB(tmp_path / "test.db")
+def db():
+    return AnalyticsDB(":memory:")
 
 
-@pytest.fixture
-def fake_output(tmp_path):
-    """Create fake output directories mimicking real structure."""
+@pytest.fixture(scope="module")
+def fake_output(tmp_path_factory):
+    """Create fake output directories mimicking real structure.
+
+    Built once per module: the matcher only reads this tree.
+    """
+    tmp_path = tmp_path_factory.mktemp("backfill_out")
     # Content piece 1: step_guide about sleep routines
     output_dir = tmp_path / "output" / "2026" / "02-february" / "2026-02-01_sleep-routines"
     output_dir.mkdir(parents=True)
@@ -1,17 +1,21 @@
 import pytest
 import sqlite3
+import threading
 from pathlib import Path
-from core.analytics.db import AnalyticsDB
+from core.analytics.db import AnalyticsDB, SCHEMA_VERSION
 
 
 @pytest.fixture
-def db(tmp_path):
-    """Create a test database in a temp directory."""
-    db_path = tmp_path / "test_analytics.db"
-    return AnalyticsDB(db_path)
+def db(request):
+    """In-memory test database; parametrize indirectly with "disk" for a file-backed one
+    (copied from the schema template)."""
+    if getattr(request, "param", "mem") == "disk":
+        return AnalyticsDB(request.getfixturevalue("fresh_db_path"))
+    return AnalyticsDB(":memory:")
 
 
 class TestSchema:
+    @pytest.mark.parametrize("db", ["mem", "disk"], indirect=True)
     def test_creates_tables(self, db):
         tables = db.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
         table_names = {t[0] for t in tables}
@@ -26,6 +30,72 @@ class TestSchema:
         assert "v_format_comparison" in view_names
         assert "v_account_summary" in view_names
 
+    def test_reopen_skips_schema_script(self, tmp_path):
+        db_path = tmp_path / "test_analytics.db"
+        db = AnalyticsDB(db_path)
+        assert db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        db.execute("DROP VIEW v_account_summary")
+        db.close()
+        # Already at SCHEMA_VERSION: the DDL is not replayed on reopen
+        db = AnalyticsDB(db_path)
+        views = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type='view'")}
+        assert "v_account_summary" not in views
+        assert db.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+    def test_disk_db_uses_wal_with_normal_sync(self, fresh_db_path):
+        db = AnalyticsDB(fresh_db_path)
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        db.close()
+
+    def test_test_mode_skips_journal_sync(self, fresh_db_path):
+        db = AnalyticsDB(fresh_db_path, test_mode=True)
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "memory"
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 0  # OFF
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        db.close()
+        assert AnalyticsDB(fresh_db_path).get_post("tt_1") is not None
+
+    def test_write_waits_for_another_connections_lock(self, fresh_db_path):
+        holder = AnalyticsDB(fresh_db_path)
+        holder.execute("BEGIN IMMEDIATE")
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            AnalyticsDB(fresh_db_path, timeout=0).upsert_post(
+                account_name="test", platform="tiktok", post_id="tt_1")
+
+        errors = []
+
+        def write():
+            try:
+                AnalyticsDB(fresh_db_path, timeout=10).upsert_post(
+                    account_name="test", platform="tiktok", post_id="tt_2")
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        waiter = threading.Thread(target=write)
+        waiter.start()
+        waiter.join(0.3)
+        assert waiter.is_alive()  # waiting on the holder's write lock, not failed
+        holder.conn.commit()
+        waiter.join(5)
+        assert errors == []
+        assert holder.get_post("tt_2") is not None
+
+    def test_in_memory_db(self):
+        db = AnalyticsDB(":memory:")
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        assert db.get_post("tt_1") is not None
+        assert not Path(":memory:").exists()
+
+    @pytest.mark.parametrize("sql, params", [
+        ("SELECT * FROM posts WHERE account_name = ? ORDER BY published_at DESC", ("test",)),
+        ("SELECT * FROM metrics_snapshots WHERE post_id = ? ORDER BY scraped_at ASC", ("tt_1",)),
+    ])
+    def test_listing_queries_use_index_order(self, db, sql, params):
+        details = [row["detail"] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        assert any("USING INDEX" in d for d in details), details
+        assert not any("TEMP B-TREE" in d for d in details), details
+
 
 class TestPostCRUD:
     def test_upsert_post(self, db):
@@ -62,6 +132,33 @@ class TestPostCRUD:
         posts = db.get_posts_for_account("acct1")
         assert len(posts) == 2
 
+    def test_get_existing_post_ids(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_2")
+        assert db.get_existing_post_ids(["tt_1", "tt_3"]) == {"tt_1"}
+        assert db.get_existing_post_ids([]) == set()
+
+    def test_get_existing_post_ids_beyond_parameter_limit(self, db):
+        stored = [{"account_name": "test", "platform": "tiktok", "post_id": f"tt_{i}"}
+                  for i in range(0, 2500, 2)]
+        db.bulk_upsert_posts(stored)
+        # Even ids are stored; the lookup spans several chunks
+        db.conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        found = db.get_existing_post_ids([f"tt_{i}" for i in range(2500)])
+        assert found == {row["post_id"] for row in stored}
+
+    def test_bulk_upsert_posts(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1", topic="kept")
+        db.bulk_upsert_posts([
+            {"account_name": "test", "platform": "tiktok", "post_id": "tt_1", "format": "step_guide"},
+            {"account_name": "test", "platform": "tiktok", "post_id": "tt_2", "hook_score": 14.0},
+        ])
+        posts = {p["post_id"]: p for p in db.get_posts_for_account("test")}
+        assert len(posts) == 2
+        assert posts["tt_1"]["topic"] == "kept"
+        assert posts["tt_1"]["format"] == "step_guide"
+        assert posts["tt_2"]["hook_score"] == 14.0
+
 
 class TestMetricsSnapshots:
     def test_insert_snapshot(self, db):
@@ -83,6 +180,17 @@ class TestMetricsSnapshots:
         snapshots = db.get_snapshots("tt_123")
         assert len(snapshots) == 2
 
+    def test_bulk_insert_snapshots(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_123")
+        db.bulk_insert_snapshots([
+            {"post_id": "tt_123", "views": 1000, "likes": 50, "comments": 5, "shares": 3, "saves": 20},
+            {"post_id": "tt_123", "views": 0},
+        ])
+        snapshots = db.get_snapshots("tt_123")
+        assert len(snapshots) == 2
+        assert snapshots[0]["engagement_rate"] == pytest.approx(78 / 1000, rel=1e-3)
+        assert snapshots[1]["engagement_rate"] == 0.0
+
 
 class TestRecommendations:
     def test_create_recommendation(self, db):
@@ -123,6 +231,53 @@ class TestViews:
         rows = db.execute("SELECT * FROM v_post_performance WHERE post_id = 'tt_1'").fetchall()
         assert len(rows) == 1  # Only latest snapshot
 
+    def test_v_post_performance_reads_latest_from_posts(self, db):
+        plan = db.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM v_post_performance "
+            "WHERE account_name = ? ORDER BY views DESC LIMIT 5", ("test",)
+        ).fetchall()
+        details = " | ".join(row["detail"] for row in plan)
+        assert "metrics_snapshots" not in details
+
+    def test_snapshot_updates_latest_metrics_on_post(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        assert db.get_post("tt_1")["latest_views"] is None
+        db.insert_snapshot(post_id="tt_1", views=1000, likes=50)
+        db.bulk_insert_snapshots([{"post_id": "tt_1", "views": 5000, "likes": 250}])
+        post = db.get_post("tt_1")
+        assert post["latest_views"] == 5000
+        assert post["latest_likes"] == 250
+        assert post["latest_engagement_rate"] == pytest.approx(0.05)
+
+    def test_migrates_db_without_latest_columns(self, tmp_path):
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE posts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, account_name TEXT NOT NULL,
+                platform TEXT NOT NULL DEFAULT '', post_id TEXT NOT NULL UNIQUE,
+                post_url TEXT, topic TEXT, format TEXT, hook_text TEXT, hook_score REAL,
+                slide_count INTEGER, content_pillar TEXT, published_at DATETIME,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE metrics_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, post_id TEXT NOT NULL,
+                scraped_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                views INTEGER DEFAULT 0, likes INTEGER DEFAULT 0, comments INTEGER DEFAULT 0,
+                shares INTEGER DEFAULT 0, saves INTEGER DEFAULT 0, engagement_rate REAL DEFAULT 0.0);
+            CREATE VIEW v_post_performance AS SELECT p.*, ms.views FROM posts p
+                JOIN metrics_snapshots ms ON p.post_id = ms.post_id;
+            INSERT INTO posts (account_name, platform, post_id) VALUES ('test', 'tiktok', 'tt_1');
+            INSERT INTO posts (account_name, platform, post_id) VALUES ('test', 'tiktok', 'tt_2');
+            INSERT INTO metrics_snapshots (post_id, scraped_at, views) VALUES ('tt_1', '2026-02-01', 100);
+            INSERT INTO metrics_snapshots (post_id, scraped_at, views) VALUES ('tt_1', '2026-02-02', 900);
+        """)
+        conn.close()
+
+        db = AnalyticsDB(db_path)
+        assert db.get_post("tt_1")["latest_views"] == 900
+        rows = db.execute("SELECT post_id, views FROM v_post_performance").fetchall()
+        assert [tuple(r) for r in rows] == [("tt_1", 900)]
+
     def test_v_format_comparison(self, db):
         db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1", format="step_guide")
         db.upsert_post(account_name="test", platform="tiktok", post_id="tt_2", format="habit_list")
@@ -130,3 +285,35 @@ class TestViews:
         db.insert_snapshot(post_id="tt_2", views=2000, likes=50, comments=5, shares=3, saves=10)
         rows = db.execute("SELECT * FROM v_format_comparison WHERE account_name = 'test'").fetchall()
         assert len(rows) == 2
+
+
+class TestPostVisuals:
+    def test_upsert_post_visuals_updates_existing(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        db.upsert_post_visuals("tt_1", dominant={"mood": "calm"}, hook={}, all_attributes={})
+        db.upsert_post_visuals("tt_1", dominant={"mood": "energetic"},
+                               hook={"composition": "wide"}, all_attributes={})
+        visuals = db.get_post_visuals("tt_1")
+        assert visuals["mood"] == "energetic"
+        assert visuals["hook_composition"] == "wide"
+
+    def test_bulk_upsert_post_visuals(self, db):
+        db.bulk_upsert_posts([
+            {"account_name": "test", "platform": "tiktok", "post_id": f"tt_{i}"} for i in range(3)
+        ])
+        db.bulk_upsert_post_visuals([
+            {"post_id": f"tt_{i}", "dominant": {"lighting": "natural"}, "hook": {"mood": "warm_cozy"}}
+            for i in range(3)
+        ])
+        for i in range(3):
+            visuals = db.get_post_visuals(f"tt_{i}")
+            assert visuals["lighting"] == "natural"
+            assert visuals["hook_mood"] == "warm_cozy"
+            assert visuals["all_attributes_json"] == "{}"
+
+    def test_get_visuals_for_account_selected_columns(self, db):
+        db.upsert_post(account_name="test", platform="tiktok", post_id="tt_1")
+        db.insert_snapshot(post_id="tt_1", views=100)
+        db.upsert_post_visuals("tt_1", dominant={"mood": "calm"}, hook={}, all_attributes={"mood": {"calm": 1}})
+        rows = db.get_visuals_for_account("test", columns=("views", "mood"))
+        assert rows == [{"views": 100, "mood": "calm"}]
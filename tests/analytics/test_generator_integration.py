@@ -1,8 +1,9 @@
 import json
 import pytest
+from collections import Counter
 from pathlib import Path
 from core.analytics.generator_integration import (
-    load_performance_context, weighted_format_choice,
+    load_performance_context, weighted_format_choice, weighted_format_choices,
     get_visual_guidance, get_explore_visual_guidance, should_explore,
 )
 
@@ -34,12 +35,10 @@ def test_load_missing_context_returns_none(tmp_path):
 def test_weighted_format_choice(context_file):
     ctx = load_performance_context(context_file)
     available_formats = ["step_guide", "habit_list", "scripts", "boring_habits"]
-    counts = {}
-    for _ in range(1000):
-        choice = weighted_format_choice(available_formats, ctx["format_weights"])
-        counts[choice] = counts.get(choice, 0) + 1
+    counts = Counter(weighted_format_choices(available_formats, ctx["format_weights"], 1000))
     # step_guide (weight 1.5) should be chosen more than habit_list (weight 0.6)
-    assert counts.get("step_guide", 0) > counts.get("habit_list", 0)
+    assert counts["step_guide"] > counts["habit_list"]
+    assert weighted_format_choice(available_formats, ctx["format_weights"]) in available_formats
 
 
 @pytest.fixture
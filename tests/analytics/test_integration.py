@@ -1,6 +1,8 @@
 """End-to-end integration test for the analytics pipeline."""
 import json
+import shutil
 import pytest
+from collections import Counter
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -8,43 +10,58 @@ from core.analytics.db import AnalyticsDB
 from core.analytics.analyzer import AccountAnalyzer
 from core.analytics.recommender import Recommender
 from core.analytics.dashboard import generate_dashboard
-from core.analytics.generator_integration import load_performance_context, weighted_format_choice
+from core.analytics.generator_integration import load_performance_context, weighted_format_choices
+
+
+@pytest.fixture(scope="class")
+def seeded_db_path(schema_template, tmp_path_factory):
+    """A DB file seeded with the pipeline's test data, built once per test class."""
+    path = tmp_path_factory.mktemp("pipeline") / "seeded.db"
+    shutil.copyfile(schema_template, path)
+    db = AnalyticsDB(path, test_mode=True)
+
+    db.bulk_upsert_posts(
+        [dict(account_name="testaccount", platform="tiktok",
+              post_id=f"sg_{i}", format="step_guide",
+              hook_text=f"5 boring habits #{i}", hook_score=16.0,
+              slide_count=5, content_pillar="sleep_routines") for i in range(10)]
+        + [dict(account_name="testaccount", platform="tiktok",
+                post_id=f"hl_{i}", format="habit_list",
+                hook_text=f"Stop doing this #{i}", hook_score=13.0,
+                slide_count=7, content_pillar="tantrum_management") for i in range(10)]
+    )
+    db.bulk_insert_snapshots(
+        [dict(post_id=f"sg_{i}", views=10000 + i * 1000,
+              likes=500 + i * 50, comments=50, shares=30, saves=200 + i * 20) for i in range(10)]
+        + [dict(post_id=f"hl_{i}", views=2000 + i * 100,
+                likes=80 + i * 5, comments=10, shares=3, saves=15) for i in range(10)]
+    )
+    db.close()
+    return path
+
+
+@pytest.fixture(scope="class")
+def report(seeded_db_path):
+    """full_report("testaccount") over the seeded data, computed once per class."""
+    db = AnalyticsDB(seeded_db_path, test_mode=True)
+    try:
+        return AccountAnalyzer(db=db).full_report("testaccount")
+    finally:
+        db.close()
 
 
 @pytest.fixture
-def full_pipeline(tmp_path):
-    """Set up a complete pipeline with test data."""
-    db = AnalyticsDB(tmp_path / "test.db")
-
-    for i in range(10):
-        db.upsert_post(
-            account_name="testaccount", platform="tiktok",
-            post_id=f"sg_{i}", format="step_guide",
-            hook_text=f"5 boring habits #{i}", hook_score=16.0,
-            slide_count=5, content_pillar="sleep_routines"
-        )
-        db.insert_snapshot(post_id=f"sg_{i}", views=10000 + i * 1000,
-                          likes=500 + i * 50, comments=50, shares=30, saves=200 + i * 20)
-
-    for i in range(10):
-        db.upsert_post(
-            account_name="testaccount", platform="tiktok",
-            post_id=f"hl_{i}", format="habit_list",
-            hook_text=f"Stop doing this #{i}", hook_score=13.0,
-            slide_count=7, content_pillar="tantrum_management"
-        )
-        db.insert_snapshot(post_id=f"hl_{i}", views=2000 + i * 100,
-                          likes=80 + i * 5, comments=10, shares=3, saves=15)
-
-    return db, tmp_path
+def full_pipeline(seeded_db_path, tmp_path):
+    """A private copy of the seeded DB, for tests that write to it."""
+    path = tmp_path / "test.db"
+    shutil.copyfile(seeded_db_path, path)
+    db = AnalyticsDB(path, test_mode=True)
+    yield db, tmp_path
+    db.close()
 
 
 class TestFullPipeline:
-    def test_analyze_generates_report(self, full_pipeline):
-        db, tmp_path = full_pipeline
-        analyzer = AccountAnalyzer(db=db)
-        report = analyzer.full_report("testaccount")
-
+    def test_analyze_generates_report(self, report):
         assert report["summary"]["total_posts"] == 20
         assert "step_guide" in report["formats"]
         assert report["formats"]["step_guide"]["avg_views"] > report["formats"]["habit_list"]["avg_views"]
@@ -54,12 +71,13 @@ class TestFullPipeline:
         db, tmp_path = full_pipeline
         mock_llm = MagicMock()
         mock_llm_cls.return_value = mock_llm
-        mock_llm.chat_completion.return_value = json.dumps([{
+        # Structured-output client: the array comes back already parsed
+        mock_llm.chat_completion.return_value = [{
             "category": "format_weight",
             "insight": "step_guide 5x better",
             "proposed_change": {"format_weights": {"step_guide": 1.5}},
             "confidence": "high"
-        }])
+        }]
 
         recommender = Recommender(db=db, api_key="test_key")
         recommender.llm = mock_llm
@@ -85,19 +103,12 @@ class TestFullPipeline:
         ctx = load_performance_context(context_path)
         assert ctx["format_weights"]["step_guide"] == 1.5
 
-    def test_dashboard_generates(self, full_pipeline):
-        db, tmp_path = full_pipeline
-        analyzer = AccountAnalyzer(db=db)
-        report = analyzer.full_report("testaccount")
+    def test_dashboard_generates(self, report, tmp_path):
         output = generate_dashboard({"testaccount": report}, output_dir=tmp_path)
         assert output.exists()
         assert "testaccount" in output.read_text()
 
-    def test_weighted_choice_uses_context(self, full_pipeline):
-        db, tmp_path = full_pipeline
+    def test_weighted_choice_uses_context(self):
         context = {"format_weights": {"step_guide": 10.0, "habit_list": 0.1}}
-        counts = {}
-        for _ in range(100):
-            choice = weighted_format_choice(["step_guide", "habit_list"], context["format_weights"])
-            counts[choice] = counts.get(choice, 0) + 1
-        assert counts.get("step_guide", 0) > 80
+        counts = Counter(weighted_format_choices(["step_guide", "habit_list"], context["format_weights"], 100))
+        assert counts["step_guide"] > 80
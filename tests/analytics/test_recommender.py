@@ -7,18 +7,20 @@ from core.analytics.recommender import Recommender
 
 
 @pytest.fixture
-def db_with_data(tmp_path):
-    db = AnalyticsDB(tmp_path / "test.db")
-    for i in range(10):
-        db.upsert_post(account_name="test", platform="tiktok", post_id=f"sg_{i}",
-                        format="step_guide", hook_score=16.0, slide_count=5,
-                        content_pillar="sleep_routines")
-        db.insert_snapshot(post_id=f"sg_{i}", views=10000, likes=500, comments=50, shares=30, saves=200)
-    for i in range(10):
-        db.upsert_post(account_name="test", platform="tiktok", post_id=f"hl_{i}",
-                        format="habit_list", hook_score=14.0, slide_count=7,
-                        content_pillar="tantrum_management")
-        db.insert_snapshot(post_id=f"hl_{i}", views=2000, likes=50, comments=5, shares=2, saves=10)
+def db_with_data():
+    db = AnalyticsDB(":memory:")
+    db.bulk_upsert_posts(
+        [dict(account_name="test", platform="tiktok", post_id=f"sg_{i}",
+              format="step_guide", hook_score=16.0, slide_count=5,
+              content_pillar="sleep_routines") for i in range(10)]
+        + [dict(account_name="test", platform="tiktok", post_id=f"hl_{i}",
+                format="habit_list", hook_score=14.0, slide_count=7,
+                content_pillar="tantrum_management") for i in range(10)]
+    )
+    db.bulk_insert_snapshots(
+        [dict(post_id=f"sg_{i}", views=10000, likes=500, comments=50, shares=30, saves=200) for i in range(10)]
+        + [dict(post_id=f"hl_{i}", views=2000, likes=50, comments=5, shares=2, saves=10) for i in range(10)]
+    )
     return db
 
 
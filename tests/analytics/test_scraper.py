@@ -1,14 +1,14 @@
 import pytest
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from pathlib import Path
 from core.analytics.scraper import AccountScraper
 from core.analytics.db import AnalyticsDB
 
 
 @pytest.fixture
-def db(tmp_path):
-    return AnalyticsDB(tmp_path / "test.db")
+def db():
+    return AnalyticsDB(":memory:")
 
 
 @pytest.fixture
@@ -44,16 +44,19 @@ def mock_apify_tiktok_response():
     ]
 
 
-class TestAccountScraper:
-    @patch("core.analytics.scraper.ApifyClient")
-    def test_scrape_tiktok_account(self, mock_apify_cls, db, mock_apify_tiktok_response):
-        mock_client = MagicMock()
-        mock_apify_cls.return_value = mock_client
-        mock_dataset = MagicMock()
-        mock_dataset.iterate_items.return_value = mock_apify_tiktok_response
+@pytest.fixture
+def apify_patch(mock_apify_tiktok_response):
+    """Patch ApifyClient so any actor run yields mock_apify_tiktok_response."""
+    with patch("core.analytics.scraper.ApifyClient") as mock_apify_cls:
+        mock_client = mock_apify_cls.return_value
         mock_client.actor.return_value.call.return_value = {"defaultDatasetId": "ds_123"}
-        mock_client.dataset.return_value = mock_dataset
+        mock_client.dataset.return_value.iterate_items.return_value = iter(mock_apify_tiktok_response)
+        yield mock_apify_cls
+
 
+class TestAccountScraper:
+    @pytest.mark.usefixtures("apify_patch")
+    def test_scrape_tiktok_account(self, db):
         scraper = AccountScraper(db=db, apify_token="test_token")
         result = scraper.scrape_account("dreamtimelullabies", "tiktok", "dreamtimelullabies")
 
@@ -62,15 +65,8 @@ class TestAccountScraper:
         posts = db.get_posts_for_account("dreamtimelullabies")
         assert len(posts) == 2
 
-    @patch("core.analytics.scraper.ApifyClient")
-    def test_scrape_updates_existing_posts(self, mock_apify_cls, db, mock_apify_tiktok_response):
-        mock_client = MagicMock()
-        mock_apify_cls.return_value = mock_client
-        mock_dataset = MagicMock()
-        mock_dataset.iterate_items.return_value = mock_apify_tiktok_response
-        mock_client.actor.return_value.call.return_value = {"defaultDatasetId": "ds_123"}
-        mock_client.dataset.return_value = mock_dataset
-
+    @pytest.mark.usefixtures("apify_patch")
+    def test_scrape_updates_existing_posts(self, db):
         # Pre-insert a post
         db.upsert_post(account_name="dreamtimelullabies", platform="tiktok", post_id="7601234567890")
 
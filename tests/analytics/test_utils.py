@@ -0,0 +1,46 @@
+import json
+import os
+import stat
+
+import pytest
+
+from core.analytics.utils import read_json, write_json_atomic
+
+
+class TestWriteJsonAtomic:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "performance_context.json"
+        write_json_atomic(path, {"format_weights": {"habit_list": 1.5}})
+        assert read_json(path) == {"format_weights": {"habit_list": 1.5}}
+        assert json.loads(path.read_text()) == {"format_weights": {"habit_list": 1.5}}
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_existing_file_keeps_its_permissions(self, tmp_path):
+        path = tmp_path / "performance_context.json"
+        path.write_text("{}")
+        os.chmod(path, 0o640)
+        write_json_atomic(path, {"sample_size": 1})
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+    def test_new_file_honours_umask(self, tmp_path):
+        path = tmp_path / "performance_context.json"
+        umask = os.umask(0o022)
+        try:
+            write_json_atomic(path, {"sample_size": 1})
+        finally:
+            os.umask(umask)
+        assert stat.S_IMODE(path.stat().st_mode) == 0o644
+
+    def test_failed_write_leaves_no_temp_file(self, tmp_path):
+        path = tmp_path / "missing" / "performance_context.json"
+        with pytest.raises(OSError):
+            write_json_atomic(path, {})
+        assert not list(tmp_path.rglob("*.tmp"))
+
+
+class TestReadJson:
+    def test_malformed_file_raises_value_error(self, tmp_path):
+        path = tmp_path / "performance_context.json"
+        path.write_text("{not json")
+        with pytest.raises(ValueError):
+            read_json(path)
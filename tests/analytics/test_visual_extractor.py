@@ -113,6 +113,14 @@ class TestExtractFromPrompt:
         result = extract_from_prompt("")
         assert result == {}
 
+    def test_repeat_calls_return_independent_copies(self):
+        first = extract_from_prompt(BEDROOM_PROMPT)
+        first["scene_setting"].append("playground")
+        first.pop("mood")
+        second = extract_from_prompt(BEDROOM_PROMPT)
+        assert second["scene_setting"][-1] != "playground"
+        assert "mood" in second
+
 
 class TestExtractFromPost:
     def test_multi_slide_dominant_selection(self):
@@ -0,0 +1,144 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from core.semantic_scorer import SemanticHookScorer, _has_midsentence_capital
+
+
+DIMENSIONS = ["curiosity_gap", "actionability", "specificity", "scroll_stop"]
+
+HOOKS = [
+    "why your cold calls keep failing (the one technique top performers use)",
+    "how to handle objections in enterprise sales",
+    "the prospecting mistake that's costing you deals",
+    "5 bedtime routines that actually work (most parents skip #3)",
+    "the bedtime mistake 90% of parents make is starting with bed",
+    "why your toddler won't sleep through the night",
+    "Stop Doing This Before Bed",
+    "3 naptime rituals",
+]
+
+
+def _word_vector(word: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(word.encode()).digest()[:4], "little")
+    return np.random.default_rng(seed).standard_normal(24)
+
+
+def _stub_embedding(text: str) -> np.ndarray:
+    """Bag-of-words embedding: texts sharing words get high cosine similarity."""
+    return np.sum([_word_vector(w) for w in text.lower().split()], axis=0).astype(np.float32)
+
+
+@pytest.fixture
+def scorer():
+    """Scorer whose embeddings endpoint is stubbed; records every request's inputs."""
+    s = SemanticHookScorer(api_key="test_key", cache_dir=None)
+    s.requests = []
+
+    def fetch(texts):
+        s.requests.append(list(texts))
+        return [_stub_embedding(t) for t in texts]
+
+    s._fetch_embeddings = fetch
+    return s
+
+
+def _per_hook_loop_scores(scorer, hook):
+    """The original scorer: one cosine per reference example, max per dimension."""
+    hook_emb = scorer._get_embedding(hook.lower())
+    scores = {}
+    for dimension in DIMENSIONS:
+        max_similarity = 0.0
+        for example in scorer.reference_examples[dimension]:
+            max_similarity = max(
+                max_similarity, scorer._similarity(hook_emb, scorer._get_embedding(example))
+            )
+        scores[dimension] = scorer._similarity_to_score(max_similarity)
+    return scores
+
+
+class TestScoresMatchPerHookLoop:
+    def test_score_hooks(self, scorer):
+        expected = [_per_hook_loop_scores(scorer, hook) for hook in HOOKS]
+        # The stub must exercise more than one score bucket to be meaningful
+        assert len({score for scores in expected for score in scores.values()}) > 1
+
+        results = scorer.score_hooks(HOOKS)
+        assert [total for total, _ in results] == [sum(s.values()) for s in expected]
+        assert scorer.score_hook(HOOKS[0])[0] == results[0][0]
+
+    def test_dimension_breakdown_with_early_exit(self, scorer):
+        for hook in HOOKS:
+            assert scorer.get_dimension_breakdown(hook) == _per_hook_loop_scores(scorer, hook)
+
+    def test_feedback_for_low_scores_and_style(self, scorer):
+        total, feedback = scorer.score_hooks(["Stop Doing This Before Bed"])[0]
+        assert "Style violation: Avoid capitalizing words mid-sentence" in feedback
+        low = [d for d, s in _per_hook_loop_scores(scorer, "Stop Doing This Before Bed").items()
+               if s < 3]
+        assert len(feedback) == len(low) + 1
+
+    def test_custom_references_come_first(self):
+        s = SemanticHookScorer(api_key="test_key", cache_dir=None,
+                               custom_references={"specificity": ["a niche example"]})
+        assert s.reference_examples["specificity"][0] == "a niche example"
+        defaults = SemanticHookScorer.REFERENCE_EXAMPLES["specificity"]
+        assert s.reference_examples["specificity"][1:] == defaults
+
+
+@pytest.mark.parametrize("hook", [
+    "Stop Doing This Before Bed",
+    "why ABC matters",
+    "nap tips for Été",
+    "el sueño del Ñandú",
+    "a B c",
+    "Bedtime tips",
+    "  Leading space then lower",
+    "café crème brûlée",
+    "ok 3am wakeups",
+    "x É",
+])
+def test_midsentence_capital_matches_per_word_scan(hook):
+    expected = any(word[0].isupper() and i > 0
+                   for i, word in enumerate(hook.split()) if len(word) > 1)
+    assert _has_midsentence_capital(hook) == expected
+
+
+class TestEmbeddingRequests:
+    def test_duplicates_and_cached_texts_not_refetched(self, scorer):
+        scorer.score_hooks(HOOKS + HOOKS[:2])
+        sent = [text for request in scorer.requests for text in request]
+        assert len(sent) == len(set(sent))
+
+        scorer.requests.clear()
+        scorer.score_hooks(HOOKS)
+        assert scorer.requests == []
+
+    def test_batches_respect_input_limit(self, scorer):
+        texts = [f"hook number {i}" for i in range(2 * SemanticHookScorer.MAX_BATCH_INPUTS + 10)]
+        scorer._get_embeddings_batch(texts)
+        assert len(scorer.requests) == 3
+        assert all(len(r) <= SemanticHookScorer.MAX_BATCH_INPUTS for r in scorer.requests)
+        assert [t for r in scorer.requests for t in r] == texts
+
+    def test_batches_respect_token_limit(self, scorer):
+        texts = [f"{i} " + "word " * 1000 for i in range(40)]  # ~1250 estimated tokens each
+        batches = scorer._pack_batches(texts)
+        assert len(batches) > 1
+        for batch in batches:
+            assert sum(len(t) // 4 + 1 for t in batch) <= SemanticHookScorer.MAX_BATCH_TOKENS
+        assert [t for b in batches for t in b] == texts
+
+    def test_oversize_text_gets_its_own_batch(self, scorer):
+        big = "x" * (SemanticHookScorer.MAX_BATCH_TOKENS * 4 + 100)
+        assert scorer._pack_batches(["a", big, "b"]) == [["a"], [big], ["b"]]
+
+    def test_disk_cache_round_trip(self, scorer, tmp_path):
+        scorer.cache_dir = tmp_path
+        first = scorer._get_embedding("a hook")
+        scorer._memory_cache.clear()
+        scorer.requests.clear()
+        second = scorer._get_embedding("a hook")
+        assert scorer.requests == []
+        np.testing.assert_allclose(first, second, rtol=1e-3)
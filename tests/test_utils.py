@@ -0,0 +1,132 @@
+import json
+import os
+import random
+
+import pytest
+
+from core.utils import SlugGenerator, TopicTracker, determine_content_format
+
+
+# Expected formats are the outputs of the original substring-matching version
+@pytest.mark.parametrize("topic, expected", [
+    ("nap transition guide", "step_guide"),
+    ("Sleep guides for toddlers", "step_guide"),
+    ("Daycare transitions", "step_guide"),
+    ("gentle sleep training methods", "step_guide"),
+    ("how to wean from night feeds", "step_guide"),
+    ("first foods introduction", "step_guide"),
+    ("morning schedule for 2 year olds", "step_guide"),
+    ("potty training steps", "step_guide"),
+    ("Firstborn jealousy", "step_guide"),
+    ("Ordering solids", "step_guide"),
+    ("Building independent play", "step_guide"),
+    ("breastfeeding tips for new moms", "habit_list"),
+    ("sensory play activities for babies", "habit_list"),
+    ("milestones by age", "habit_list"),
+    ("bedtime routine ideas", "habit_list"),
+    ("toddler tantrum strategies", "habit_list"),
+    ("teething relief", "habit_list"),
+    ("baby gear essentials", "habit_list"),
+    ("sibling dynamics", "habit_list"),
+    ("Speech development by month", "habit_list"),
+    ("screen time", "habit_list"),
+])
+def test_determine_content_format(topic, expected):
+    assert determine_content_format(topic) == expected
+
+
+class TestSlugSuffixes:
+    def test_suffixes_count_up_per_base_slug(self):
+        gen = SlugGenerator()
+        titles = ["Nap tips", "Nap tips", "Sleep", "Nap tips"]
+        slugs = [gen.generate(t, ensure_unique=True) for t in titles]
+        assert slugs == ["nap-tips", "nap-tips-2", "sleep", "nap-tips-3"]
+
+    def test_skips_suffixes_taken_by_explicit_titles(self):
+        gen = SlugGenerator()
+        for title in ["nap tips", "nap tips 2", "nap tips 3", "nap tips", "nap tips"]:
+            gen.generate(title, ensure_unique=True)
+        assert gen.used_slugs == {"nap-tips"} | {f"nap-tips-{i}" for i in range(2, 6)}
+
+    def test_matches_rescanning_from_two(self):
+        """Same slugs as the original scan-from-2 loop, over a random title sequence."""
+        rng = random.Random(7)
+        titles = [rng.choice(["a", "a 2", "a 3", "b", "b 2", "a-2 2"]) for _ in range(300)]
+
+        gen = SlugGenerator()
+        used = set()
+        for title in titles:
+            slug = gen.generate(title)
+            if slug in used:
+                counter = 2
+                while f"{slug}-{counter}" in used:
+                    counter += 1
+                slug = f"{slug}-{counter}"
+            used.add(slug)
+            assert gen.generate(title, ensure_unique=True) == slug
+
+    def test_reset_restarts_suffixes(self):
+        gen = SlugGenerator()
+        gen.generate("x", ensure_unique=True)
+        gen.generate("x", ensure_unique=True)
+        gen.reset()
+        assert [gen.generate("x", ensure_unique=True) for _ in range(2)] == ["x", "x-2"]
+
+
+class TestTopicTrackerCache:
+    @pytest.fixture
+    def tracker(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # history lives under ./output/<account>/history
+        return TopicTracker("testaccount", max_history=3)
+
+    def test_unchanged_file_is_not_reparsed(self, tracker):
+        assert tracker._load_cached() is tracker._load_cached()
+
+    def test_load_history_returns_a_copy(self, tracker):
+        tracker.load_history()["topics"].append({"topic": "not saved"})
+        assert tracker.get_recent_topics() == []
+
+    def test_failed_write_leaves_cache_matching_file(self, tracker, monkeypatch):
+        tracker.add_topic("nap transition guide", "out/1")
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(type(tracker.history_file), "write_bytes", fail)
+        monkeypatch.setattr("builtins.open", fail)
+        with pytest.raises(OSError):
+            tracker.add_topic("teething relief", "out/2")
+        assert tracker.get_recent_topics() == ["nap transition guide"]
+
+    def test_same_mtime_rewrite_is_picked_up(self, tracker):
+        tracker.add_topic("nap transition guide", "out/1")
+        stat = tracker.history_file.stat()
+        history = json.loads(tracker.history_file.read_text())
+        history["topics"][0]["topic"] = "teething relief and more"
+        tracker.history_file.write_text(json.dumps(history))
+        os.utime(tracker.history_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert tracker.get_recent_topics() == ["teething relief and more"]
+
+    def test_external_write_is_picked_up(self, tracker):
+        tracker.add_topic("nap transition guide", "out/1")
+        history = json.loads(tracker.history_file.read_text())
+        history["topics"].insert(0, {"topic": "teething relief", "generated_at": "",
+                                     "output_dir": ""})
+        tracker.history_file.write_text(json.dumps(history))
+        stat = tracker.history_file.stat()
+        os.utime(tracker.history_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert tracker.get_recent_topics() == ["teething relief", "nap transition guide"]
+
+    def test_similarity_sees_new_topics(self, tracker):
+        assert tracker.is_topic_too_similar("toddler sleep regression") == (False, None)
+        tracker.add_topic("toddler sleep regression", "out/1")
+        assert tracker.is_topic_too_similar("toddler sleep regression")[0]
+
+    def test_rolling_window(self, tracker):
+        for i in range(5):
+            tracker.add_topic(f"topic {i}", f"out/{i}")
+        assert tracker.get_recent_topics() == ["topic 4", "topic 3", "topic 2"]
+        fresh = TopicTracker("testaccount", max_history=3)
+        assert fresh.get_recent_topics() == ["topic 4", "topic 3", "topic 2"]
@@ -0,0 +1,256 @@
+import io
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image
+
+from core.visual_analyzer import GRID_GAP, MAX_GRID_SIDE, MAX_IMAGE_SIDE, VisualAnalyzer
+
+
+def _jpeg(width=40, height=60, color="red") -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def _analysis(num_slides: int) -> str:
+    return json.dumps({
+        "post_type": "text_heavy",
+        "text_density": "high",
+        "slides": [{"slide_number": i + 1, "text_overlays": [f"slide {i + 1}"]}
+                   for i in range(num_slides)],
+    })
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeHost:
+    """Stands in for the image host: url -> bytes, or an exception to raise."""
+
+    def __init__(self, images: dict):
+        self.images = images
+        self.requested = []
+
+    def get(self, url, timeout=None, stream=False):
+        self.requested.append(url)
+        body = self.images[url]
+        if isinstance(body, Exception):
+            raise body
+        return FakeResponse(body)
+
+
+@pytest.fixture
+def make_analyzer(tmp_path):
+    """Factory for a VisualAnalyzer with a fake image host and a mocked GPT-4o client."""
+
+    def _make(images: dict, stitch_slides: bool = False, cache_dir=tmp_path / "cache"):
+        analyzer = VisualAnalyzer(
+            openrouter_key="test_key", cache_dir=cache_dir, stitch_slides=stitch_slides
+        )
+        analyzer.host = FakeHost(images)
+        analyzer._session = analyzer.host
+        analyzer.client = MagicMock()
+
+        def create(messages, **kwargs):
+            images_sent = [c for c in messages[0]["content"] if c["type"] == "image_url"]
+            response = MagicMock()
+            response.choices[0].message.content = _analysis(len(images_sent))
+            return response
+
+        analyzer.client.chat.completions.create.side_effect = create
+        return analyzer
+
+    return _make
+
+
+class TestAnalysisCache:
+    def test_memory_cache_hit_skips_all_work(self, make_analyzer):
+        urls = ["https://img/1.jpg"]
+        analyzer = make_analyzer({urls[0]: _jpeg()})
+        first = analyzer.analyze_post(urls, "caption")
+        first["slides"].clear()  # callers get copies
+        second = analyzer.analyze_post(urls, "caption")
+        assert len(second["slides"]) == 1
+        assert analyzer.host.requested == urls
+        assert analyzer.client.chat.completions.create.call_count == 1
+
+    def test_same_images_at_new_urls_hit_content_key(self, make_analyzer):
+        body = _jpeg()
+        analyzer = make_analyzer({"https://img/a.jpg": body, "https://cdn/b.jpg": body})
+        analyzer.analyze_post(["https://img/a.jpg"], "caption")
+        result = analyzer.analyze_post(["https://cdn/b.jpg"], "caption")
+        assert len(result["slides"]) == 1
+        assert analyzer.host.requested == ["https://img/a.jpg", "https://cdn/b.jpg"]
+        assert analyzer.client.chat.completions.create.call_count == 1
+
+    def test_caption_is_part_of_the_key(self, make_analyzer):
+        urls = ["https://img/1.jpg"]
+        analyzer = make_analyzer({urls[0]: _jpeg()})
+        analyzer.analyze_post(urls, "caption")
+        analyzer.analyze_post(urls, "another caption")
+        assert analyzer.client.chat.completions.create.call_count == 2
+
+    def test_expired_entries_are_ignored(self, make_analyzer, monkeypatch):
+        urls = ["https://img/1.jpg"]
+        make_analyzer({urls[0]: _jpeg()}).analyze_post(urls, "caption")
+        monkeypatch.setattr("core.visual_analyzer.VISUAL_CACHE_TTL", -1)
+        analyzer = make_analyzer({urls[0]: _jpeg()})
+        analyzer.analyze_post(urls, "caption")
+        assert analyzer.client.chat.completions.create.call_count == 1
+
+    def test_empty_analysis_not_cached(self, make_analyzer):
+        urls = ["https://img/1.jpg"]
+        analyzer = make_analyzer({urls[0]: _jpeg()})
+        analyzer.client.chat.completions.create.side_effect = RuntimeError("API down")
+        assert analyzer.analyze_post(urls, "caption")["slides"] == []
+        assert list(analyzer.cache_dir.glob("*.json")) == []
+
+
+class TestPartialDownloads:
+    def test_partial_download_not_cached_by_url(self, make_analyzer):
+        urls = ["https://img/1.jpg", "https://img/2.jpg"]
+        analyzer = make_analyzer({urls[0]: _jpeg(), urls[1]: ConnectionError("reset")})
+        result = analyzer.analyze_post(urls, "caption")
+        assert len(result["slides"]) == 1
+
+        # The host recovers: the full post is analyzed instead of the partial result
+        analyzer.host.images[urls[1]] = _jpeg(color="blue")
+        result = analyzer.analyze_post(urls, "caption")
+        assert len(result["slides"]) == 2
+        assert analyzer.client.chat.completions.create.call_count == 2
+
+    def test_complete_download_cached_by_url(self, make_analyzer):
+        urls = ["https://img/1.jpg", "https://img/2.jpg"]
+        analyzer = make_analyzer({urls[0]: _jpeg(), urls[1]: _jpeg(color="blue")})
+        analyzer.analyze_post(urls, "caption")
+
+        fresh = make_analyzer({})  # same cache dir, nothing downloadable
+        result = fresh.analyze_post(urls, "caption")
+        assert len(result["slides"]) == 2
+        assert fresh.host.requested == []
+        fresh.client.chat.completions.create.assert_not_called()
+
+
+class TestEncodedImageCache:
+    def test_cache_size_tracked_without_rescanning(self, make_analyzer, monkeypatch):
+        urls = [f"https://img/{i}.jpg" for i in range(4)]
+        analyzer = make_analyzer({url: _jpeg() for url in urls})
+        scans = []
+        scan = analyzer._scan_encoded
+        monkeypatch.setattr(analyzer, "_scan_encoded", lambda: scans.append(1) or scan())
+
+        for url in urls:
+            analyzer.analyze_post([url], "caption")
+
+        on_disk = sum(p.stat().st_size for p in (analyzer.cache_dir / "images").glob("*.b64"))
+        assert analyzer._encoded_bytes == on_disk
+        assert len(scans) == 1  # seeded once, never rescanned under the cap
+
+    def test_evicts_least_recently_used(self, make_analyzer, monkeypatch):
+        urls = [f"https://img/{i}.jpg" for i in range(4)]
+        analyzer = make_analyzer({url: _jpeg() for url in urls})
+        analyzer.analyze_post(urls[:1], "caption")
+        os.utime(analyzer._encoded_path(urls[0]), (1000, 1000))
+        entry_size = analyzer._encoded_bytes
+        monkeypatch.setattr("core.visual_analyzer.IMAGE_CACHE_MAX_BYTES", int(entry_size * 2.5))
+
+        for i, url in enumerate(urls[1:], start=1):
+            analyzer.analyze_post([url], "caption")
+            os.utime(analyzer._encoded_path(url), (1000 + i, 1000 + i))  # ordered mtimes
+
+        remaining = {p.name for p in (analyzer.cache_dir / "images").glob("*.b64")}
+        assert analyzer._encoded_path(urls[0]).name not in remaining
+        assert analyzer._encoded_path(urls[-1]).name in remaining
+        assert analyzer._encoded_bytes <= int(entry_size * 2.5)
+
+
+class TestStitchedSlides:
+    def test_grid_dimensions(self, make_analyzer):
+        # 3 slides -> 2x2 grid; cells take the widest slide's width (80px),
+        # so the 40x60 slides scale to 80x120 and the second row is 40px tall
+        slides = [_jpeg(40, 60), _jpeg(40, 60), _jpeg(80, 40)]
+        with Image.open(io.BytesIO(make_analyzer({})._stitch_slides(slides))) as grid:
+            assert grid.size == (2 * 80 + GRID_GAP, 120 + 40 + GRID_GAP)
+
+    def test_grid_capped_at_max_side(self, make_analyzer):
+        slides = [_jpeg(1500, 3000) for _ in range(4)]
+        with Image.open(io.BytesIO(make_analyzer({})._stitch_slides(slides))) as grid:
+            assert max(grid.size) == MAX_GRID_SIDE
+
+    def test_stitched_post_sent_as_one_image(self, make_analyzer):
+        urls = ["https://img/1.jpg", "https://img/2.jpg", "https://img/3.jpg"]
+        analyzer = make_analyzer({url: _jpeg() for url in urls}, stitch_slides=True)
+        analyzer.analyze_post(urls, "caption")
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert [c["type"] for c in content] == ["text", "image_url"]
+        assert "3 slides are concatenated" in content[0]["text"]
+
+    def test_corrupt_slide_falls_back_to_per_slide_images(self, make_analyzer):
+        urls = ["https://img/1.jpg", "https://img/2.jpg"]
+        analyzer = make_analyzer(
+            {urls[0]: _jpeg(), urls[1]: b"\xff\xd8 not really a jpeg"}, stitch_slides=True
+        )
+        result = analyzer.analyze_post(urls, "caption")
+
+        messages = analyzer.client.chat.completions.create.call_args.kwargs["messages"]
+        images_sent = [c for c in messages[0]["content"] if c["type"] == "image_url"]
+        assert len(images_sent) == 2
+        assert len(result["slides"]) == 2
+
+
+class TestImagePreparation:
+    def test_download_returns_streamed_buffer(self, make_analyzer):
+        body = _jpeg()
+        analyzer = make_analyzer({"https://img/1.jpg": body})
+        data = analyzer._download_image("https://img/1.jpg")
+        assert isinstance(data, bytearray)
+        assert data == body
+
+    def test_small_jpeg_passed_through_uncopied(self, make_analyzer):
+        data = bytearray(_jpeg())
+        assert make_analyzer({})._prepare_image(data) is data
+
+    def test_large_image_downscaled_to_jpeg(self, make_analyzer):
+        buf = io.BytesIO()
+        Image.new("RGB", (3000, 1500), "green").save(buf, "PNG")
+        prepared = make_analyzer({})._prepare_image(bytearray(buf.getvalue()))
+        with Image.open(io.BytesIO(prepared)) as img:
+            assert img.format == "JPEG"
+            assert img.size == (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE // 2)
+
+
+class TestNormalizeResult:
+    def test_defaults_filled_and_unknown_post_type_replaced(self, make_analyzer):
+        raw = json.dumps({"post_type": "selfie", "slides": [{"text_styling": None}, {}]})
+        result = make_analyzer({})._normalize_result(raw)
+        assert result["post_type"] == "visual_first"
+        assert result["slide_count"] == 2
+        assert [s["slide_number"] for s in result["slides"]] == [1, 2]
+        assert result["slides"][0]["text_styling"]["text_effects"] == ["none"]
+        assert result["overall_visual_style"]["color_palette"] == []
+
+    def test_non_object_response_yields_empty_result(self, make_analyzer):
+        analyzer = make_analyzer({})
+        response = MagicMock()
+        response.choices[0].message.content = "[1, 2]"
+        analyzer.client.chat.completions.create.side_effect = None
+        analyzer.client.chat.completions.create.return_value = response
+        assert analyzer._analyze_with_gpt4o(["data:,"], "caption") == analyzer._empty_result()
@@ -4,14 +4,24 @@ Verification script for semantic hook scoring implementation
 Run this to verify the semantic scorer is working correctly
 """
 
-import os
 import sys
-from dotenv import load_dotenv
+from functools import lru_cache
 
-# Load environment
-load_dotenv()
 
-from core.semantic_scorer import SemanticHookScorer
+@lru_cache(maxsize=1)
+def get_scorer():
+    """One shared, warmed-up scorer per process, so repeat checks skip setup"""
+    # Imported here so loading this module stays cheap (numpy, requests)
+    from dotenv import load_dotenv
+    from core.semantic_scorer import SemanticHookScorer
+
+    # Load environment
+    load_dotenv()
+
+    scorer = SemanticHookScorer(use_openrouter=True)
+    scorer.warm_up()
+    return scorer
+
 
 def test_semantic_scorer():
     """Test the semantic hook scorer with various hooks"""
@@ -21,7 +31,7 @@ def test_semantic_scorer():
 
     # Initialize scorer
     try:
-        scorer = SemanticHookScorer(use_openrouter=True)
+        scorer = get_scorer()
         print("✅ SemanticHookScorer initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize scorer: {e}")
@@ -49,35 +59,43 @@ def test_semantic_scorer():
         }
     ]
 
+    # Score every hook up front: one embeddings request covers all unseen hooks
+    all_hooks = [hook for test_case in test_cases for hook in test_case["hooks"]]
+    results = iter(scorer.score_hooks(all_hooks))
+
     all_passed = True
 
     for test_case in test_cases:
         account = test_case["account"]
         threshold = test_case["threshold"]
 
-        print(f"\n{'=' * 70}")
-        print(f"Testing {account} (threshold: {threshold}/20)")
-        print(f"{'=' * 70}")
+        # Each account's report is collected and written in one go
+        lines = [
+            f"\n{'=' * 70}",
+            f"Testing {account} (threshold: {threshold}/20)",
+            f"{'=' * 70}",
+        ]
 
         for hook in test_case["hooks"]:
-            total, feedback = scorer.score_hook(hook)
+            total, feedback = next(results)
             passed = total >= threshold
 
             status = "✅ PASS" if passed else "❌ FAIL"
-            print(f"\n{status} [{total}/20] \"{hook}\"")
+            lines.append(f"\n{status} [{total}/20] \"{hook}\"")
 
             if not passed:
                 all_passed = False
-                print(f"  Feedback:")
-                for fb in feedback:
-                    print(f"    - {fb}")
+                lines.append(f"  Feedback:")
+                lines.extend(f"    - {fb}" for fb in feedback)
+
+        sys.stdout.write("\n".join(lines) + "\n")
 
-    print(f"\n{'=' * 70}")
     if all_passed:
-        print("✅ All tests passed! Semantic scoring is working correctly.")
+        verdict = "✅ All tests passed! Semantic scoring is working correctly."
     else:
-        print("⚠️  Some tests failed. Consider lowering thresholds or adjusting scoring.")
-    print(f"{'=' * 70}\n")
+        verdict = "⚠️  Some tests failed. Consider lowering thresholds or adjusting scoring."
+    sys.stdout.write(f"\n{'=' * 70}\n{verdict}\n{'=' * 70}\n\n")
+    sys.stdout.flush()
 
     return all_passed
 